@@ -3,17 +3,19 @@ Architect Agent - Analyzes requirements and designs solution architecture
 Creates high-level design plans before code generation
 """
 
-import google.generativeai as genai
-import os
+from typing import Optional
+
+from agents.generation_profiles import DEFAULT_PROFILE, get_generation_config
+from agents.llm_provider import GeminiProvider
+from agents.request_context import DeadlineExceeded, RequestContext
+from agents.tracing import NULL_TRACE
 
 
 class ArchitectAgent:
     """Agent responsible for architectural analysis and design planning"""
     
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+    def __init__(self, provider=None):
+        self.provider = provider or GeminiProvider()
         
         self.prompt_template = """You are an expert software architect. Analyze the given requirement and provide a detailed architectural design.
 
@@ -31,19 +33,38 @@ Provide architectural guidance including:
 Format your response clearly with sections and bullet points.
 Be concise but comprehensive in your analysis."""
     
-    def generate(self, requirement: str) -> str:
+    def generate(self, requirement: str, context: Optional[RequestContext] = None) -> str:
         """Generate architectural analysis for given requirement"""
+        trace = context.trace if context else NULL_TRACE
         try:
             prompt = self.prompt_template.format(requirement=requirement)
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                )
-            )
-            architecture = response.text
-            return self._format_architecture(architecture)
+            if context:
+                context.check()
+            with trace.span("agent.architect", prompt_chars=len(prompt)) as span:
+                result = self.provider.generate({
+                    "agent": "architect",
+                    "prompt": prompt,
+                    "config": get_generation_config(context.profile if context else DEFAULT_PROFILE, "architect"),
+                    "deadline": context.deadline if context else None,
+                    "cancel": context.cancel if context else None,
+                    "session_id": context.session_id if context else None,
+                    "hints": {"input_chars": len(requirement)},
+                })
+                span.set(**result["usage"], output_chars=len(result["text"]))
+            if context:
+                context.record_usage(result["usage"])
+            architecture = result["text"]
+            with trace.span("postprocess.architect", input_chars=len(architecture)) as span:
+                architecture = self._format_architecture(architecture)
+                span.set(output_chars=len(architecture))
+            return architecture
+        except DeadlineExceeded:
+            raise
         except Exception as e:
+            if context:
+                context.record_usage(getattr(e, "usage", None))
+            if context and context.expired():
+                raise DeadlineExceeded(str(e)) from e
             return f"Error generating architecture: {str(e)}"
     
     def _format_architecture(self, architecture: str) -> str:
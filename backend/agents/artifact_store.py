@@ -0,0 +1,259 @@
+"""
+Artifact Store - Content-addressed storage of generated code, tests and results
+Each text is written once under its SHA-256 (objects/ab/abcdef...), so repeated
+generations share storage. A SQLite index records every generate/execute run
+by prompt hash, session, pass/fail and time, and the oldest runs are dropped
+when the objects exceed the size budget.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Dict, List, Optional
+
+from agents.generation_profiles import normalize_prompt
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def prompt_hash(prompt: str) -> str:
+    """Hash of the normalized prompt, matching prompts that differ only in case or spacing"""
+    return content_hash(normalize_prompt(prompt))
+
+
+class ArtifactStore:
+    """Deduplicating file store with a SQLite index of runs"""
+
+    GC_TARGET = 0.8  # collect down to this share of max_bytes
+
+    def __init__(self, root: str, max_bytes: int = 256 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS objects (
+                    hash TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    session_id TEXT,
+                    prompt_hash TEXT,
+                    status TEXT NOT NULL,
+                    passed INTEGER,
+                    code_hash TEXT NOT NULL,
+                    tests_hash TEXT NOT NULL,
+                    result_hash TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS runs_prompt ON runs (prompt_hash, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS runs_session ON runs (session_id, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS runs_passed ON runs (passed, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at)")
+            # Garbage collection checks whether an object is still used
+            for column in ("code_hash", "tests_hash", "result_hash"):
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS runs_{column} ON runs ({column})")
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _put(self, text: str, written: List) -> str:
+        """Write a text once under its content hash, adding new objects' (path, size) to written; caller holds the lock"""
+        digest = content_hash(text)
+        if self._conn.execute("SELECT 1 FROM objects WHERE hash = ?", (digest,)).fetchone():
+            return digest
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = text.encode()
+        # Write then rename, so a crash never leaves a truncated object under a valid hash
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        written.append((path, len(data)))
+        self._conn.execute("INSERT INTO objects (hash, size, created_at) VALUES (?, ?, ?)", (digest, len(data), time.time()))
+        return digest
+
+    def record(
+        self,
+        kind: str,
+        code: str,
+        tests: str,
+        result: Dict,
+        session_id: Optional[str] = None,
+        prompt: Optional[str] = None,
+        passed: Optional[bool] = None,
+    ) -> int:
+        """
+        Store a generate or execute run
+
+        Args:
+            kind: "generate" or "execute"
+            code: Code that was generated or executed
+            tests: Tests that were generated or executed
+            result: JSON-serializable run result (stored as its own object)
+            session_id: Session the run belongs to
+            prompt: Prompt the code was generated from, if known
+            passed: Whether the tests passed (execute runs)
+
+        Returns:
+            Id of the new run
+        """
+        with self._lock:
+            written = []
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                code_hash = self._put(code, written)
+                tests_hash = self._put(tests, written)
+                result_hash = self._put(json.dumps(result, sort_keys=True, default=str), written)
+                cursor = self._conn.execute(
+                    "INSERT INTO runs (kind, session_id, prompt_hash, status, passed, code_hash, tests_hash, result_hash, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        kind, session_id, prompt_hash(prompt) if prompt else None, result.get("status", "unknown"),
+                        None if passed is None else int(passed), code_hash, tests_hash, result_hash, time.time()
+                    )
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # The index no longer knows these objects, so their files would never be collected
+                for path, _ in written:
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+            self._bytes += sum(size for _, size in written)
+            if self._bytes > self.max_bytes:
+                self._collect()
+            return cursor.lastrowid
+
+    def _collect(self):
+        """Drop the oldest runs and the objects only they used until under GC_TARGET of the budget; caller holds the lock"""
+        target = self.max_bytes * self.GC_TARGET
+        while self._bytes > target:
+            runs = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            oldest = self._conn.execute(
+                "SELECT id, code_hash, tests_hash, result_hash FROM runs ORDER BY created_at LIMIT ?",
+                (max(runs // 20, 1),)
+            ).fetchall()
+            if not oldest:
+                break
+            self._conn.executemany("DELETE FROM runs WHERE id = ?", [(row["id"],) for row in oldest])
+            candidates = {row[column] for row in oldest for column in ("code_hash", "tests_hash", "result_hash")}
+            for digest in candidates:
+                if self._referenced(digest):
+                    continue
+                row = self._conn.execute("SELECT size FROM objects WHERE hash = ?", (digest,)).fetchone()
+                path = self._object_path(digest)
+                if os.path.exists(path):
+                    os.remove(path)
+                self._conn.execute("DELETE FROM objects WHERE hash = ?", (digest,))
+                self._bytes -= row["size"] if row else 0
+
+    def _referenced(self, digest: str) -> bool:
+        return any(
+            self._conn.execute(f"SELECT 1 FROM runs WHERE {column} = ? LIMIT 1", (digest,)).fetchone()
+            for column in ("code_hash", "tests_hash", "result_hash")
+        )
+
+    def get_object(self, digest: str) -> Optional[str]:
+        """Read a stored text by content hash"""
+        digest = digest.lower()
+        path = self._object_path(digest)
+        if len(digest) != 64 or not set(digest) <= set("0123456789abcdef") or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read().decode()
+
+    def get(self, run_id: int) -> Optional[Dict]:
+        """A run with its code, tests and result loaded"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        run = self._to_dict(row)
+        run["code"] = self.get_object(row["code_hash"])
+        run["tests"] = self.get_object(row["tests_hash"])
+        result = self.get_object(row["result_hash"])
+        run["result"] = json.loads(result) if result is not None else None
+        return run
+
+    def find(
+        self,
+        prompt: Optional[str] = None,
+        session_id: Optional[str] = None,
+        kind: Optional[str] = None,
+        passed: Optional[bool] = None,
+        since: Optional[float] = None,
+        limit: int = 50,
+    ) -> List[Dict]:
+        """Index rows matching all given filters, newest first"""
+        clauses, params = [], []
+        if prompt is not None:
+            clauses.append("prompt_hash = ?")
+            params.append(prompt_hash(prompt))
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if passed is not None:
+            clauses.append("passed = ?")
+            params.append(int(passed))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM runs {where} ORDER BY created_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def stats(self) -> Dict:
+        """Run and object counts and bytes stored"""
+        with self._lock:
+            runs = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            objects = self._conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+            return {
+                "runs": runs,
+                "objects": objects,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        run = dict(row)
+        run["passed"] = None if run["passed"] is None else bool(run["passed"])
+        return run
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_artifact_store(name: str = "sqlite", **kwargs) -> Optional[ArtifactStore]:
+    """Build the artifact store configured for this deployment, or None when disabled"""
+    if name == "sqlite":
+        return ArtifactStore(**kwargs)
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown artifact store: {name}")
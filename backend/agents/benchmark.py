@@ -0,0 +1,119 @@
+"""
+Benchmark - Empirical complexity fits and run-to-run comparison
+Turns the timings from sandbox_benchmark.py into a best-fitting growth
+class per benchmark and flags speed regressions between runs of a session
+"""
+
+import math
+from typing import Dict, List, Optional
+
+# Growth classes, ordered from cheapest to most expensive
+COMPLEXITY_MODELS = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+]
+COMPLEXITY_RANK = {name: rank for rank, (name, _) in enumerate(COMPLEXITY_MODELS)}
+
+MIN_POINTS = 3  # sizes needed before a fit is reported
+REGRESSION_RATIO = 1.25  # slowdown at the largest shared n that counts as a regression
+EXPONENT_MARGIN = 0.3  # growth exponent increase needed before a class change counts
+
+
+def fit_complexity(points: List[Dict]) -> Dict:
+    """
+    Fit t = c * f(n) for each growth class and pick the best
+
+    Args:
+        points: [{"n": int, "seconds": float}, ...]
+
+    Returns:
+        Dict with the best "complexity", the log-log "exponent" and the
+        relative error of every model (None values with too few points)
+    """
+    points = [point for point in points if point["n"] > 1 and point["seconds"] > 0]
+    if len(points) < MIN_POINTS:
+        return {"complexity": None, "exponent": None, "errors": {}}
+
+    errors = {}
+    for name, model in COMPLEXITY_MODELS:
+        features = [model(point["n"]) for point in points]
+        # Least squares through the origin on relative error, so large n does not dominate
+        weights = [1 / point["seconds"] ** 2 for point in points]
+        scale = (
+            sum(w * f * point["seconds"] for w, f, point in zip(weights, features, points))
+            / sum(w * f * f for w, f in zip(weights, features))
+        )
+        errors[name] = round(math.sqrt(sum(
+            ((point["seconds"] - scale * f) / point["seconds"]) ** 2 for f, point in zip(features, points)
+        ) / len(points)), 4)
+
+    xs = [math.log(point["n"]) for point in points]
+    ys = [math.log(point["seconds"]) for point in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    exponent = (
+        sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+        / sum((x - mean_x) ** 2 for x in xs)
+    )
+    return {
+        "complexity": min(errors, key=errors.get),
+        "exponent": round(exponent, 3),
+        "errors": errors,
+    }
+
+
+def summarize(report: Dict) -> Dict:
+    """Timing curve and complexity fit per benchmark from a runner report"""
+    results = {}
+    for name, run in report.get("benchmarks", {}).items():
+        results[name] = {
+            "points": [
+                {"n": point["n"], "ms": round(point["seconds"] * 1000, 4)}
+                for point in run["points"]
+            ],
+            "error": run["error"],
+            **fit_complexity(run["points"]),
+        }
+    return results
+
+
+def compare(previous: Optional[Dict], current: Dict) -> Dict:
+    """
+    Compare two runs' results benchmark by benchmark
+
+    Returns:
+        Dict per shared benchmark with the time ratio at the largest n both
+        runs reached, complexity before/after and a regression flag
+    """
+    if not previous:
+        return {}
+    comparison = {}
+    for name, now in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        before_ms = {point["n"]: point["ms"] for point in before["points"]}
+        shared = [point for point in now["points"] if point["n"] in before_ms]
+        if not shared:
+            continue
+        largest = shared[-1]
+        ratio = largest["ms"] / before_ms[largest["n"]] if before_ms[largest["n"]] else None
+        # Neighbouring classes are hard to tell apart, so the exponent must agree
+        worse_class = (
+            before.get("complexity") is not None and now.get("complexity") is not None
+            and COMPLEXITY_RANK[now["complexity"]] > COMPLEXITY_RANK[before["complexity"]]
+            and now["exponent"] - before["exponent"] > EXPONENT_MARGIN
+        )
+        comparison[name] = {
+            "n": largest["n"],
+            "previous_ms": before_ms[largest["n"]],
+            "current_ms": largest["ms"],
+            "ratio": round(ratio, 3) if ratio is not None else None,
+            "previous_complexity": before.get("complexity"),
+            "current_complexity": now.get("complexity"),
+            "regression": bool(worse_class or (ratio is not None and ratio > REGRESSION_RATIO)),
+        }
+    return comparison
@@ -3,19 +3,21 @@ Coder Agent - Generates Python code using LangChain and Gemini
 Custom logic for code validation and formatting
 """
 
-import google.generativeai as genai
-import os
 import ast
 import re
+from typing import Optional
+
+from agents.generation_profiles import DEFAULT_PROFILE, get_generation_config
+from agents.llm_provider import GeminiProvider
+from agents.request_context import DeadlineExceeded, RequestContext
+from agents.tracing import NULL_TRACE
 
 
 class CoderAgent:
     """Agent responsible for generating Python code"""
     
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+    def __init__(self, provider=None):
+        self.provider = provider or GeminiProvider()
         
         self.prompt_template = """You are an expert Python developer. Generate clean, well-documented Python code.
 
@@ -31,19 +33,38 @@ Requirements:
 
 Generate ONLY the Python code, no explanations:"""
     
-    def generate(self, request: str) -> str:
+    def generate(self, request: str, context: Optional[RequestContext] = None) -> str:
         """Generate code based on user request"""
+        trace = context.trace if context else NULL_TRACE
         try:
             prompt = self.prompt_template.format(request=request)
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                )
-            )
-            code = response.text
-            return self._validate_and_format_code(code)
+            if context:
+                context.check()
+            with trace.span("agent.coder", prompt_chars=len(prompt)) as span:
+                result = self.provider.generate({
+                    "agent": "coder",
+                    "prompt": prompt,
+                    "config": get_generation_config(context.profile if context else DEFAULT_PROFILE, "coder"),
+                    "deadline": context.deadline if context else None,
+                    "cancel": context.cancel if context else None,
+                    "session_id": context.session_id if context else None,
+                    "hints": {"input_chars": len(request)},
+                })
+                span.set(**result["usage"], output_chars=len(result["text"]))
+            if context:
+                context.record_usage(result["usage"])
+            code = result["text"]
+            with trace.span("postprocess.coder", input_chars=len(code)) as span:
+                code = self._validate_and_format_code(code)
+                span.set(output_chars=len(code))
+            return code
+        except DeadlineExceeded:
+            raise
         except Exception as e:
+            if context:
+                context.record_usage(getattr(e, "usage", None))
+            if context and context.expired():
+                raise DeadlineExceeded(str(e)) from e
             return f"# Error generating code: {str(e)}"
     
     def _validate_and_format_code(self, code: str) -> str:
@@ -60,7 +81,7 @@ Generate ONLY the Python code, no explanations:"""
     
     def _extract_code_blocks(self, text: str) -> str:
         """Extract code from markdown code blocks if present"""
-        code_block_match = re.search(r'```(?:python)?\n(.*?)\n```', text, re.DOTALL)
+        code_block_match = re.search(r'```(?:python)?\n(.*?)(?:\n```|\Z)', text, re.DOTALL)
         if code_block_match:
             return code_block_match.group(1).strip()
         return text
@@ -4,78 +4,306 @@ Safe code execution with error handling and output parsing
 """
 
 import subprocess
+import json
 import os
+import queue
 import tempfile
-from typing import Dict, Tuple
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agents.tracing import NULL_TRACE
 
 
 class CodeExecutor:
     """Executes Python code in a sandboxed environment"""
-    
+
     TIMEOUT = 10  # seconds
-    
-    @staticmethod
-    def execute(code: str, test_mode: bool = False) -> Dict:
+    CANCEL_POLL = 0.1  # seconds between checks of the cancel event
+    PROFILE_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_profile.py")
+    BENCHMARK_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_benchmark.py")
+    COVERAGE_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_coverage.py")
+    BENCHMARK_MIN_N = 16
+    BENCHMARK_MAX_N = 2 ** 20
+    BENCHMARK_BUDGET = 0.8  # share of the timeout given to timing
+
+    def __init__(self, timeout: int = TIMEOUT):
+        self.timeout = timeout
+
+    def execute(
+        self,
+        code: str,
+        test_mode: bool = False,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        trace=None,
+        profile: bool = False,
+        benchmark: bool = False,
+        coverage_lines: Optional[int] = None,
+        select: Optional[List[str]] = None,
+    ) -> Dict:
         """
         Execute Python code safely
-        
+
         Args:
             code: Python code to execute
             test_mode: If True, run as pytest
-        
+            timeout: Per-call limit in seconds, capped at the executor timeout
+            cancel: Event that kills the child when set
+            trace: Trace that receives temp-file and subprocess spans
+            profile: In test mode, run pytest under cProfile and tracemalloc
+            benchmark: Time the code's bench_* functions at doubling sizes
+            coverage_lines: In test mode, trace per-test coverage of the first
+                coverage_lines lines (the code under test)
+            select: In test mode, run only these test ids
+
         Returns:
-            Dict with status, output, and errors
+            Dict with status, output, and errors. On timeout, stdout holds
+            the output produced before the process was killed.
+        """
+        result = None
+        for event in self.stream(
+            code, test_mode=test_mode, timeout=timeout, cancel=cancel, trace=trace,
+            profile=profile, benchmark=benchmark, coverage_lines=coverage_lines, select=select
+        ):
+            if event["type"] == "exit":
+                result = event
+        return {
+            "status": result["status"],
+            "stdout": result["stdout"],
+            "stderr": result["stderr"],
+            "returncode": result["returncode"],
+            "profile": result.get("profile"),
+            "benchmark": result.get("benchmark"),
+            "coverage": result.get("coverage")
+        }
+
+    def stream(
+        self,
+        code: str,
+        test_mode: bool = False,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        trace=None,
+        profile: bool = False,
+        benchmark: bool = False,
+        coverage_lines: Optional[int] = None,
+        select: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
         """
+        Execute Python code, yielding output lines as the child produces them
+
+        Args:
+            code: Python code to execute
+            test_mode: If True, run as pytest
+            timeout: Per-call limit in seconds (e.g. the request's remaining
+                deadline), capped at the executor timeout
+            cancel: Event that kills the child when set (client disconnected)
+            trace: Trace that receives temp-file and subprocess spans
+            profile: In test mode, run pytest under cProfile and tracemalloc;
+                the exit event then carries a "profile" report of the tested
+                file's functions and per-test peak memory
+            benchmark: Time the code's bench_* functions at doubling input
+                sizes; the exit event then carries a "benchmark" report
+            coverage_lines: In test mode, trace the line and branch coverage
+                each test gets of the first coverage_lines lines (the code
+                under test); the exit event then carries a "coverage" report
+            select: In test mode, run only these test ids (the part of the
+                pytest node id after the file, e.g. "test_add[1-2]")
+
+        Yields:
+            {"type": "line", "stream": "stdout"|"stderr", "line": str} for each
+            output line, then a final {"type": "exit", ...} event with status,
+            stdout, stderr and returncode. Status is "timeout" when the limit
+            passed and "cancelled" when the cancel event was set.
+        """
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        trace = trace or NULL_TRACE
+        temp_file = None
+        process = None
+        span = None
+        report_file = None
+        report_key = None
+        output = {"stdout": [], "stderr": []}
+        watchdog_stop = None
         try:
-            with tempfile.NamedTemporaryFile(
-                mode='w',
-                suffix='.py',
-                delete=False,
-                dir=os.getcwd()
-            ) as f:
-                f.write(code)
-                temp_file = f.name
-            
-            try:
-                if test_mode:
-                    # Run as pytest
-                    result = subprocess.run(
-                        ["python", "-m", "pytest", temp_file, "-v"],
-                        capture_output=True,
-                        text=True,
-                        timeout=CodeExecutor.TIMEOUT
-                    )
-                else:
-                    # Run as regular script
-                    result = subprocess.run(
-                        ["python", temp_file],
-                        capture_output=True,
-                        text=True,
-                        timeout=CodeExecutor.TIMEOUT
-                    )
-                
-                return {
-                    "status": "success" if result.returncode == 0 else "failed",
-                    "stdout": result.stdout,
-                    "stderr": result.stderr,
-                    "returncode": result.returncode
+            with trace.span("executor.write_temp", code_chars=len(code)):
+                with tempfile.NamedTemporaryFile(
+                    mode='w',
+                    suffix='.py',
+                    delete=False,
+                    dir=os.getcwd()
+                ) as f:
+                    f.write(code)
+                    temp_file = f.name
+
+            if benchmark:
+                report_key = "benchmark"
+                report_file = temp_file + ".benchmark.json"
+                command = [
+                    "python", "-u", self.BENCHMARK_RUNNER, temp_file, report_file,
+                    str(self.BENCHMARK_MIN_N), str(self.BENCHMARK_MAX_N), str(timeout * self.BENCHMARK_BUDGET)
+                ]
+            elif test_mode and coverage_lines is not None:
+                # Run pytest inside the coverage runner, which writes a JSON report
+                report_key = "coverage"
+                report_file = temp_file + ".coverage.json"
+                command = ["python", "-u", self.COVERAGE_RUNNER, temp_file, report_file, str(coverage_lines)]
+            elif test_mode and profile:
+                # Run pytest inside the profiling runner, which writes a JSON report
+                report_key = "profile"
+                report_file = temp_file + ".profile.json"
+                command = ["python", "-u", self.PROFILE_RUNNER, temp_file, report_file]
+            elif test_mode and select:
+                # Run only the selected tests
+                command = ["python", "-u", "-m", "pytest", *(f"{temp_file}::{test_id}" for test_id in select), "-v"]
+            elif test_mode:
+                # Run as pytest
+                command = ["python", "-u", "-m", "pytest", temp_file, "-v"]
+            else:
+                # Run as regular script
+                command = ["python", "-u", temp_file]
+
+            span = trace.start_span("executor.subprocess", test_mode=test_mode, timeout=timeout)
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1
+            )
+            lines: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+            for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr)):
+                threading.Thread(target=self._pump, args=(pipe, name, lines), daemon=True).start()
+
+            open_streams = 2
+            deadline = time.monotonic() + timeout
+            # Kills the child even when nobody iterates this generator any more
+            watchdog_stop = threading.Event()
+            killed = {}
+            threading.Thread(
+                target=self._watchdog, args=(process, deadline, cancel, watchdog_stop, killed), daemon=True
+            ).start()
+            timed_out = False
+            cancelled = False
+
+            while open_streams:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                if cancel is not None:
+                    if cancel.is_set():
+                        cancelled = True
+                        break
+                    remaining = min(remaining, self.CANCEL_POLL)
+                try:
+                    name, line = lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    open_streams -= 1
+                    continue
+                output[name].append(line)
+                yield {"type": "line", "stream": name, "line": line.rstrip("\n")}
+
+            # The watchdog may have killed the child before the loop noticed
+            timed_out = timed_out or killed.get("reason") == "timeout"
+            cancelled = cancelled or killed.get("reason") == "cancelled"
+            if timed_out or cancelled:
+                process.kill()
+                process.wait()
+                # Keep whatever the child flushed before it was killed
+                while open_streams:
+                    try:
+                        name, line = lines.get(timeout=1)
+                    except queue.Empty:
+                        break
+                    if line is None:
+                        open_streams -= 1
+                        continue
+                    output[name].append(line)
+                    yield {"type": "line", "stream": name, "line": line.rstrip("\n")}
+
+                span.set(status="cancelled" if cancelled else "timeout", returncode=-1)
+                yield {
+                    "type": "exit",
+                    "status": "cancelled" if cancelled else "timeout",
+                    "stdout": "".join(output["stdout"]),
+                    "stderr": "".join(output["stderr"]) + (
+                        "Execution cancelled" if cancelled else f"Execution timed out after {round(timeout, 2):g}s"
+                    ),
+                    "returncode": -1
                 }
-            
-            finally:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
-        
-        except subprocess.TimeoutExpired:
-            return {
-                "status": "timeout",
-                "stdout": "",
-                "stderr": f"Execution timed out after {CodeExecutor.TIMEOUT}s",
-                "returncode": -1
+                return
+
+            returncode = process.wait(timeout=max(deadline - time.monotonic(), 1))
+            span.set(status="success" if returncode == 0 else "failed", returncode=returncode)
+            yield {
+                "type": "exit",
+                "status": "success" if returncode == 0 else "failed",
+                "stdout": "".join(output["stdout"]),
+                "stderr": "".join(output["stderr"]),
+                "returncode": returncode,
+                report_key or "profile": self._read_report(report_file)
             }
+
         except Exception as e:
-            return {
+            yield {
+                "type": "exit",
                 "status": "error",
                 "stdout": "",
                 "stderr": str(e),
                 "returncode": -1
-            }
\ No newline at end of file
+            }
+
+        finally:
+            if watchdog_stop is not None:
+                watchdog_stop.set()
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+            if span is not None:
+                span.set(stdout_lines=len(output["stdout"]), stderr_lines=len(output["stderr"]))
+                span.end()
+            for path in (temp_file, report_file):
+                if path and os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def _read_report(path: Optional[str]) -> Optional[Dict]:
+        """Load a runner's JSON report, if one was requested and written"""
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _watchdog(self, process, deadline: float, cancel: Optional[threading.Event], stop: threading.Event, killed: Dict):
+        """Kill the child once the deadline passes or cancel is set; `killed` records why"""
+        while not stop.is_set() and process.poll() is None:
+            if cancel is not None and cancel.is_set():
+                killed["reason"] = "cancelled"
+            elif time.monotonic() >= deadline:
+                killed["reason"] = "timeout"
+            else:
+                stop.wait(self.CANCEL_POLL)
+                continue
+            process.kill()
+            return
+
+    @staticmethod
+    def _pump(pipe, name: str, lines: "queue.Queue"):
+        """Forward lines from a child pipe to the queue; None marks end of stream"""
+        try:
+            for line in iter(pipe.readline, ""):
+                lines.put((name, line))
+        finally:
+            pipe.close()
+            lines.put((name, None))
+
+
+def create_executor(name: str = "subprocess", **kwargs) -> CodeExecutor:
+    """Build the executor backend configured for this deployment"""
+    if name == "subprocess":
+        return CodeExecutor(**kwargs)
+    raise ValueError(f"Unknown executor backend: {name}")
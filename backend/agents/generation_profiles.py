@@ -0,0 +1,66 @@
+"""
+Generation Profiles - Per-agent generation settings selectable per request
+"default" keeps the original creative settings; "fast" is deterministic,
+bounded and cacheable
+"""
+
+import hashlib
+import re
+from typing import Dict
+
+DEFAULT_PROFILE = "default"
+
+PROFILES: Dict[str, Dict] = {
+    "default": {
+        "cacheable": False,
+        "agents": {
+            "architect": {"temperature": 0.7},
+            "coder": {"temperature": 0.7},
+            "tester": {"temperature": 0.7},
+        },
+    },
+    "fast": {
+        "cacheable": True,
+        "agents": {
+            # The analysis is prose; stop once the model starts writing code
+            "architect": {
+                "temperature": 0.0,
+                "max_output_tokens": 768,
+                "stop_sequences": ["\n```"],
+            },
+            # Stop at the closing fence or a __main__ demo block
+            "coder": {
+                "temperature": 0.0,
+                "max_output_tokens": 2048,
+                "stop_sequences": ["\n```\n", "\nif __name__ =="],
+            },
+            "tester": {
+                "temperature": 0.0,
+                "max_output_tokens": 2048,
+                "stop_sequences": ["\n```\n", "\nif __name__ =="],
+            },
+        },
+    },
+}
+
+
+def get_generation_config(profile: str, agent: str) -> Dict:
+    """Get the generation config of an agent under a profile"""
+    settings = PROFILES.get(profile, PROFILES[DEFAULT_PROFILE])
+    return dict(settings["agents"][agent])
+
+
+def is_cacheable(profile: str) -> bool:
+    """Whether outputs generated under a profile are deterministic enough to cache"""
+    return PROFILES.get(profile, PROFILES[DEFAULT_PROFILE])["cacheable"]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize case and whitespace so trivially different prompts share a key"""
+    return re.sub(r"\s+", " ", prompt).strip().lower()
+
+
+def cache_key(stage: str, profile: str, *parts: str) -> str:
+    """Build a cache key for a stage output from normalized inputs"""
+    digest = hashlib.sha256("\x00".join(normalize_prompt(part) for part in parts).encode()).hexdigest()
+    return f"{stage}:{profile}:{digest}"
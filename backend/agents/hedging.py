@@ -0,0 +1,158 @@
+"""
+Hedged Provider - Cuts tail latency of agent LLM calls
+If a call has not returned by a latency percentile tracked per agent, an
+identical backup request is issued and the first response wins. The tokens
+of the discarded call are still paid for, so they count against the budget.
+"""
+
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Callable, Deque, Dict, Optional
+
+
+class HedgedProvider:
+    """Provider wrapper that hedges slow calls with a second identical request"""
+
+    HISTORY = 200  # recent latencies kept per agent
+
+    def __init__(
+        self,
+        inner,
+        percentile: float = 95,
+        min_samples: int = 20,
+        max_hedge_ratio: float = 0.1,
+        max_workers: int = 16,
+        on_discarded: Optional[Callable[[Dict, Dict], None]] = None,
+    ):
+        """
+        Args:
+            inner: Provider that performs the actual calls
+            percentile: Latency percentile (per agent) after which to hedge
+            min_samples: Calls needed before an agent's percentile is trusted
+            max_hedge_ratio: Cap on hedged calls as a fraction of all calls,
+                and on discarded tokens as a fraction of all tokens
+            max_workers: Threads available for primary and hedge requests
+            on_discarded: Called with (request, usage) for each call whose
+                response lost the race, once it finishes
+        """
+        self.inner = inner
+        self.name = getattr(inner, "name", "hedged")
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.on_discarded = on_discarded
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = Lock()
+        self._stats = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "skipped_over_budget": 0,
+            "tokens": 0,
+            "hedge_loser_tokens": 0,
+        }
+
+    def generate(self, request: Dict) -> Dict:
+        """Run a call, hedging it if it outlives the agent's latency percentile"""
+        # Latency percentiles are tracked per agent and model
+        agent = "/".join(filter(None, (request.get("agent", "unknown"), request.get("model"))))
+        with self._lock:
+            self._stats["calls"] += 1
+        delay = self.hedge_delay(agent)
+
+        primary = self._submit(agent, request)
+        if delay is None:
+            return primary.result()
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge_budget():
+            return primary.result()
+
+        hedge = self._submit(agent, request)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                # The loser keeps its thread until the SDK call returns; its result is discarded
+                for other in pending:
+                    other.cancel()
+                for other in {primary, hedge} - {future}:
+                    other.add_done_callback(lambda lost: self._discard(request, lost))
+                with self._lock:
+                    self._stats["hedge_wins" if future is hedge else "primary_wins"] += 1
+                result = future.result()
+                result["usage"] = dict(result["usage"], hedged=True, hedge_won=future is hedge)
+                return result
+        raise error
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few samples"""
+        with self._lock:
+            samples = sorted(self._latencies.get(agent, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return samples[index]
+
+    def stats(self) -> Dict:
+        """Hedge rate, win counts and current per-agent thresholds"""
+        with self._lock:
+            stats = dict(self._stats)
+            agents = list(self._latencies)
+        calls = stats["calls"] or 1
+        stats["hedge_rate"] = round(stats["hedged"] / calls, 4)
+        stats["hedge_win_rate"] = round(stats["hedge_wins"] / stats["hedged"], 4) if stats["hedged"] else 0
+        stats["percentile"] = self.percentile
+        stats["max_hedge_ratio"] = self.max_hedge_ratio
+        stats["thresholds_ms"] = {
+            agent: round(delay * 1000, 2) if delay is not None else None
+            for agent, delay in ((agent, self.hedge_delay(agent)) for agent in agents)
+        }
+        return stats
+
+    def _submit(self, agent: str, request: Dict) -> Future:
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, self.inner.generate, request)
+        future.add_done_callback(lambda done: self._observe(agent, done))
+        return future
+
+    def _observe(self, agent: str, future: Future):
+        """Track the latency of every completed call, including hedge losers"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        usage = future.result()["usage"]
+        with self._lock:
+            self._latencies.setdefault(agent, deque(maxlen=self.HISTORY)).append(usage.get("latency_ms", 0) / 1000)
+            self._stats["tokens"] += usage.get("total_tokens", 0)
+
+    def _discard(self, request: Dict, future: Future):
+        """Account for a call that lost the race (or failed) once it has finished"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        usage = getattr(error, "usage", None) if error is not None else future.result()["usage"]
+        if not usage:
+            return
+        usage = dict(usage, hedged=True, hedge_loser=True)
+        with self._lock:
+            self._stats["hedge_loser_tokens"] += usage.get("total_tokens", 0)
+        if self.on_discarded is not None:
+            self.on_discarded(request, usage)
+
+    def _take_hedge_budget(self) -> bool:
+        with self._lock:
+            over_calls = self._stats["hedged"] + 1 > self.max_hedge_ratio * self._stats["calls"]
+            over_tokens = self._stats["hedge_loser_tokens"] > self.max_hedge_ratio * self._stats["tokens"]
+            if over_calls or over_tokens:
+                self._stats["skipped_over_budget"] += 1
+                return False
+            self._stats["hedged"] += 1
+            return True
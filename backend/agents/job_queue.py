@@ -0,0 +1,307 @@
+"""
+Job Queue - Durable SQLite-backed queue for /generate and /execute jobs
+Jobs survive restarts: running jobs hold a lease that workers renew, and
+jobs whose lease expired (e.g. the server died) are put back in the queue.
+Finished jobs are deleted once they are older than the retention window.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from threading import Lock
+from typing import AsyncContextManager, Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger("pochita.jobs")
+
+FINISHED = ("succeeded", "failed")
+
+
+class JobQueue:
+    """Durable FIFO job queue stored in a local SQLite database"""
+
+    LEASE_SECONDS = 30
+    MAX_ATTEMPTS = 3
+    STATS_WINDOW = 200  # most recent started jobs used for wait-time stats
+    RETENTION_SECONDS = 24 * 3600
+    PURGE_INTERVAL = 60  # seconds between deletions of expired finished jobs
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: int = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+        retention_seconds: int = RETENTION_SECONDS,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._next_purge = 0.0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    lease_until REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_finished ON jobs (status, finished_at)")
+
+    def submit(self, kind: str, payload: Dict) -> str:
+        """Add a job to the queue and return its id"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(payload), time.time())
+            )
+        return job_id
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Atomically take the oldest queued job and mark it running
+
+        Returns:
+            The claimed job, or None if the queue is empty
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._recover_expired(now)
+                self._purge_finished(now)
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (now, now + self.lease_seconds, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        job["status"] = "running"
+        job["started_at"] = now
+        job["attempts"] += 1
+        return job
+
+    def renew_lease(self, job_id: str):
+        """Extend the lease of a running job"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, job_id)
+            )
+
+    def complete(self, job_id: str, result: Dict):
+        """Mark a job succeeded and store its result"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'succeeded', result = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                (json.dumps(result), time.time(), job_id)
+            )
+
+    def fail(self, job_id: str, error: str):
+        """Mark a job failed"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, lease_until = NULL WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job by id"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Number of queued jobs ahead of a queued job"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+                "AND created_at < (SELECT created_at FROM jobs WHERE id = ? AND status = 'queued')",
+                (job_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> Dict:
+        """Queue depth, status counts and wait/run time statistics"""
+        now = time.time()
+        with self._lock:
+            counts = {
+                row["status"]: row["n"]
+                for row in self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")
+            }
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+            recent = self._conn.execute(
+                "SELECT created_at, started_at, finished_at FROM jobs WHERE started_at IS NOT NULL "
+                "ORDER BY started_at DESC LIMIT ?",
+                (self.STATS_WINDOW,)
+            ).fetchall()
+
+        waits = sorted((row["started_at"] - row["created_at"]) * 1000 for row in recent)
+        runs = sorted(
+            (row["finished_at"] - row["started_at"]) * 1000
+            for row in recent if row["finished_at"] is not None
+        )
+        return {
+            "queue_depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "succeeded": counts.get("succeeded", 0),
+            "failed": counts.get("failed", 0),
+            "oldest_queued_age_ms": round((now - oldest) * 1000, 2) if oldest else 0,
+            "wait_ms": self._distribution(waits),
+            "run_ms": self._distribution(runs),
+        }
+
+    def _recover_expired(self, now: float):
+        """Requeue running jobs whose worker stopped renewing the lease"""
+        self._conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Job abandoned after repeated worker failures', "
+            "finished_at = ?, lease_until = NULL "
+            "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+            (now, now, self.max_attempts)
+        )
+        self._conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, lease_until = NULL "
+            "WHERE status = 'running' AND lease_until < ?",
+            (now,)
+        )
+
+    def _purge_finished(self, now: float):
+        """Delete jobs that finished before the retention window, at most once per PURGE_INTERVAL"""
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.PURGE_INTERVAL
+        self._conn.execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+            (now - self.retention_seconds,)
+        )
+
+    @staticmethod
+    def _distribution(values: List[float]) -> Dict:
+        if not values:
+            return {"count": 0, "avg": 0, "p50": 0, "p95": 0, "max": 0}
+        return {
+            "count": len(values),
+            "avg": round(sum(values) / len(values), 2),
+            "p50": round(values[len(values) // 2], 2),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            "max": round(values[-1], 2),
+        }
+
+    @staticmethod
+    def _to_dict(row) -> Dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+class JobWorkerPool:
+    """Asyncio worker tasks that drain a JobQueue"""
+
+    POLL_INTERVAL = 1.0  # seconds between polls when the queue is empty
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[str, Dict], Dict],
+        workers: int = 2,
+        gate: Optional[Callable[[Dict], AsyncContextManager]] = None,
+    ):
+        """
+        Args:
+            queue: Queue to drain
+            handler: Sync callable (kind, payload) -> result dict, run in the threadpool
+            workers: Number of concurrent worker tasks
+            gate: Optional callable returning an async context manager that is
+                held around the handler (e.g. a scheduler slot)
+        """
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.gate = gate
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run(index)) for index in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the worker tasks; their jobs are recovered once the lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a submit"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self, index: int):
+        while True:
+            job = await run_in_threadpool(self.queue.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(job)
+
+    async def _process(self, job: Dict):
+        # The lease is renewed while the job waits at the gate as well
+        task = asyncio.ensure_future(self._handle(job))
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.queue.lease_seconds / 3)
+                if not task.done():
+                    await run_in_threadpool(self.queue.renew_lease, job["id"])
+            result = task.result()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Job %s failed", job["id"])
+            await run_in_threadpool(self.queue.fail, job["id"], str(e))
+            return
+        await run_in_threadpool(self.queue.complete, job["id"], result)
+
+    async def _handle(self, job: Dict) -> Dict:
+        if self.gate is None:
+            return await run_in_threadpool(self.handler, job["kind"], job["payload"])
+        async with self.gate(job):
+            return await run_in_threadpool(self.handler, job["kind"], job["payload"])
@@ -0,0 +1,196 @@
+"""
+Live Profiler - Time-boxed profile of the running server process
+Samples the stacks of every thread and asyncio task and diffs two
+tracemalloc snapshots. Nothing runs (and tracemalloc stays off) unless a
+profile is in progress.
+"""
+
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+# Leaf frames of threads parked in a blocking call; excluded from CPU samples by default
+IDLE_LEAVES = {
+    ("wait", "threading.py"),
+    ("get", "queue.py"),
+    ("_worker", "thread.py"),
+    ("select", "selectors.py"),
+    ("_pump", "executor.py"),
+}
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Statistical CPU profiler for threads and tasks, plus a memory growth diff"""
+
+    MEMORY_FRAMES = 10  # traceback depth kept by tracemalloc while profiling
+
+    def __init__(self, interval: float = 0.005, task_interval: float = 0.05, max_depth: int = 64):
+        """
+        Args:
+            interval: Seconds between thread stack samples
+            task_interval: Seconds between asyncio task stack samples
+            max_depth: Frames kept per sampled stack
+        """
+        self.interval = interval
+        self.task_interval = task_interval
+        self.max_depth = max_depth
+
+    async def run(self, seconds: float, memory: bool = True, memory_top: int = 25, idle: bool = False) -> Dict:
+        """
+        Profile the process for a fixed time; must be awaited on the server loop
+
+        Args:
+            seconds: Profiling duration
+            memory: Also diff tracemalloc snapshots taken at start and end
+            memory_top: Allocation sites reported in the memory diff
+            idle: Keep samples of threads parked in a blocking wait
+
+        Returns:
+            Dict with thread and task samples as collapsed stacks, a
+            pstats-like per-function table and the memory diff
+        """
+        loop = asyncio.get_running_loop()
+        started_tracing = False
+        before = None
+        if memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.MEMORY_FRAMES)
+                started_tracing = True
+            before = await loop.run_in_executor(None, tracemalloc.take_snapshot)
+
+        thread_stacks: Counter = Counter()
+        task_stacks: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample_threads, args=(stop, thread_stacks, idle), name="live-profiler", daemon=True
+        )
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            deadline = loop.time() + seconds
+            while loop.time() < deadline:
+                self._sample_tasks(task_stacks)
+                await asyncio.sleep(self.task_interval)
+        finally:
+            stop.set()
+            await loop.run_in_executor(None, sampler.join)
+        elapsed = time.perf_counter() - start
+
+        result = {
+            "duration_s": round(elapsed, 3),
+            "interval_ms": self.interval * 1000,
+            "threads": {
+                "samples": sum(thread_stacks.values()),
+                "collapsed": self._collapsed(thread_stacks),
+                "pstats": self._pstats(thread_stacks, self.interval),
+            },
+            "tasks": {
+                "samples": sum(task_stacks.values()),
+                "collapsed": self._collapsed(task_stacks),
+            },
+        }
+        if memory:
+            try:
+                after = await loop.run_in_executor(None, tracemalloc.take_snapshot)
+                result["memory"] = self._memory_diff(before, after, memory_top)
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+        return result
+
+    def _sample_threads(self, stop: threading.Event, stacks: Counter, idle: bool):
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                leaf = (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename))
+                if not idle and leaf in IDLE_LEAVES:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(labels))] += 1
+
+    def _sample_tasks(self, stacks: Counter):
+        """Record where each pending task is suspended (runs on the loop thread)"""
+        current = asyncio.current_task()
+        for task in asyncio.all_tasks():
+            if task is current or task.done():
+                continue
+            frames = task.get_stack(limit=self.max_depth)
+            labels = [f"task:{task.get_name()}"] + [_frame_label(frame.f_code) for frame in frames]
+            stacks[";".join(labels)] += 1
+
+    @staticmethod
+    def _collapsed(stacks: Counter) -> str:
+        """Brendan Gregg collapsed-stack format, one "frame;frame count" per line"""
+        return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def _pstats(stacks: Counter, interval: float, top: int = 40) -> List[Dict]:
+        """Per-function self and cumulative sample counts, sorted by cumulative time"""
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in stacks.items():
+            frames = stack.split(";")[1:]  # drop the thread name
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for function in set(frames):
+                cumulative[function] += count
+        return [
+            {
+                "function": function,
+                "self_samples": own[function],
+                "cumulative_samples": count,
+                "self_ms": round(own[function] * interval * 1000, 1),
+                "cumulative_ms": round(count * interval * 1000, 1),
+            }
+            for function, count in cumulative.most_common(top)
+        ]
+
+    @staticmethod
+    def _memory_diff(before, after, top: int) -> Dict:
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+        before = before.filter_traces(ignore)
+        after = after.filter_traces(ignore)
+        diff = after.compare_to(before, "lineno")
+        return {
+            "total_kib": round(sum(stat.size for stat in after.statistics("filename")) / 1024, 1),
+            "growth_kib": round(sum(stat.size_diff for stat in diff) / 1024, 1),
+            "top": [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_diff_kib": round(stat.size_diff / 1024, 2),
+                    "size_kib": round(stat.size / 1024, 2),
+                    "count_diff": stat.count_diff,
+                }
+                for stat in diff[:top]
+            ],
+        }
+
+
+def check_admin_token(expected: Optional[str], provided: Optional[str]) -> bool:
+    """Constant-time comparison of the admin token; no token configured means disabled"""
+    if not expected or not provided:
+        return False
+    return hmac.compare_digest(expected.encode(), provided.encode())
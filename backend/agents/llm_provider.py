@@ -0,0 +1,87 @@
+"""
+LLM Provider - Single call path for agent generate_content requests
+Wraps the Gemini SDK and reports usage and latency for every call
+"""
+
+import os
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+from agents.usage_tracker import extract_usage
+
+
+class LLMCallError(Exception):
+    """Raised when a provider call fails; carries the usage record of the attempt"""
+
+    def __init__(self, message: str, usage: Optional[Dict] = None):
+        super().__init__(message)
+        self.usage = usage
+
+
+class GeminiProvider:
+    """Calls Gemini models through google.generativeai"""
+
+    name = "gemini"
+    DEFAULT_MODEL = "gemini-2.0-flash"
+
+    def __init__(self, api_key: Optional[str] = None, default_model: str = DEFAULT_MODEL):
+        import google.generativeai as genai
+
+        self.genai = genai
+        self.genai.configure(api_key=api_key or os.getenv("GEMINI_API_KEY"))
+        self.default_model = default_model
+        self._models: Dict = {}
+        self._lock = Lock()
+
+    def generate(self, request: Dict) -> Dict:
+        """
+        Run a single generate_content call
+
+        Args:
+            request: Dict with agent, prompt, optional model, a config dict
+                of generation parameters (temperature, max_output_tokens, ...),
+                an optional time.monotonic() deadline, the request's optional
+                cancel event and session id, and optional routing hints
+
+        Returns:
+            Dict with the response text and its usage record
+        """
+        agent = request.get("agent", "unknown")
+        model_name = request.get("model") or self.default_model
+        start = time.perf_counter()
+        try:
+            # The deadline becomes the RPC timeout, so a late call is abandoned
+            request_options = {}
+            if request.get("deadline") is not None:
+                remaining = request["deadline"] - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Request deadline exceeded before the call")
+                request_options["timeout"] = remaining
+            response = self._get_model(model_name).generate_content(
+                request["prompt"],
+                generation_config=self.genai.types.GenerationConfig(**request.get("config", {})),
+                request_options=request_options or None
+            )
+            usage = extract_usage(response, agent, model_name, time.perf_counter() - start)
+            return {"text": response.text, "usage": usage}
+        except Exception as e:
+            usage = extract_usage(None, agent, model_name, time.perf_counter() - start)
+            raise LLMCallError(str(e), usage) from e
+
+    def _get_model(self, model_name: str):
+        """Get a cached GenerativeModel instance for the given model name"""
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self.genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+
+def create_provider(name: str = "gemini", **kwargs):
+    """Build the provider configured for this deployment"""
+    if name == "gemini":
+        return GeminiProvider(**kwargs)
+    if name == "replay":
+        from agents.replay import ReplayProvider
+        return ReplayProvider(**kwargs)
+    raise ValueError(f"Unknown LLM provider: {name}")
@@ -0,0 +1,150 @@
+"""
+Model Router - Picks a model tier per agent call from cheap local signals
+Simple prompts go to the fastest tier; large inputs and repair iterations
+escalate. A per-model circuit breaker falls back to another tier after
+repeated failures.
+"""
+
+import time
+from threading import Lock
+from typing import Dict, List
+
+
+class ModelRouter:
+    """Chooses a model tier per call and tracks model health"""
+
+    DEFAULT_TIERS = ["gemini-2.0-flash-lite", "gemini-2.0-flash", "gemini-2.5-flash"]
+
+    def __init__(
+        self,
+        tiers: List[str] = None,
+        long_input_chars: int = 600,
+        large_code_chars: int = 4000,
+        failure_threshold: int = 3,
+        cooldown: float = 60,
+    ):
+        """
+        Args:
+            tiers: Model names ordered from fastest to strongest
+            long_input_chars: User input length that escalates one tier
+            large_code_chars: Size of code passed to the tester that escalates one tier
+            failure_threshold: Consecutive failures that open a model's circuit
+            cooldown: Seconds an open circuit stays open before a trial call
+        """
+        self.tiers = tiers or list(self.DEFAULT_TIERS)
+        self.long_input_chars = long_input_chars
+        self.large_code_chars = large_code_chars
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._health: Dict[str, Dict] = {
+            model: {"failures": 0, "open_until": 0.0, "calls": 0, "errors": 0}
+            for model in self.tiers
+        }
+        self._routed: Dict[str, int] = {model: 0 for model in self.tiers}
+        self._fallbacks = 0
+        self._lock = Lock()
+
+    def select_tier(self, hints: Dict) -> int:
+        """
+        Pick a tier index from call signals
+
+        Args:
+            hints: Dict with input_chars, code_chars and repair
+
+        Returns:
+            Index into the tiers list
+        """
+        tier = 0
+        if hints.get("input_chars", 0) > self.long_input_chars:
+            tier += 1
+        if hints.get("code_chars", 0) > self.large_code_chars:
+            tier += 1
+        if hints.get("repair"):
+            tier += 1
+        return min(tier, len(self.tiers) - 1)
+
+    def candidates(self, tier: int) -> List[str]:
+        """
+        Models to try for a tier: the chosen one, then stronger tiers, then
+        weaker ones, skipping models whose circuit is open
+        """
+        order = self.tiers[tier:] + list(reversed(self.tiers[:tier]))
+        now = time.time()
+        with self._lock:
+            available = [model for model in order if self._health[model]["open_until"] <= now]
+        return available or [self.tiers[tier]]
+
+    def record(self, model: str, ok: bool, fallback: bool = False):
+        """Update a model's health after a call"""
+        with self._lock:
+            health = self._health.setdefault(model, {"failures": 0, "open_until": 0.0, "calls": 0, "errors": 0})
+            health["calls"] += 1
+            self._routed[model] = self._routed.get(model, 0) + 1
+            if fallback:
+                self._fallbacks += 1
+            if ok:
+                health["failures"] = 0
+                return
+            health["errors"] += 1
+            health["failures"] += 1
+            if health["failures"] >= self.failure_threshold:
+                health["open_until"] = time.time() + self.cooldown
+
+    def stats(self) -> Dict:
+        """Calls routed per model, fallbacks and circuit state"""
+        now = time.time()
+        with self._lock:
+            return {
+                "tiers": list(self.tiers),
+                "routed": dict(self._routed),
+                "fallbacks": self._fallbacks,
+                "models": {
+                    model: {
+                        "calls": health["calls"],
+                        "errors": health["errors"],
+                        "consecutive_failures": health["failures"],
+                        "circuit_open": health["open_until"] > now,
+                    }
+                    for model, health in self._health.items()
+                },
+            }
+
+
+class RoutingProvider:
+    """Provider wrapper that sets the model of each call from a ModelRouter"""
+
+    def __init__(self, inner, router: ModelRouter):
+        self.inner = inner
+        self.router = router
+        self.name = getattr(inner, "name", "routed")
+
+    def generate(self, request: Dict) -> Dict:
+        """Run a call on the routed model, falling back to other tiers on failure"""
+        tier = self.router.select_tier(request.get("hints", {}))
+        candidates = self.router.candidates(tier)
+        error = None
+        # Try the routed model and at most one fallback so a failure cannot fan out
+        for model in candidates[:2]:
+            fallback = model != self.router.tiers[tier]
+            if error is not None and self._stopped(request):
+                break
+            try:
+                result = self.inner.generate(dict(request, model=model))
+            except Exception as e:
+                # A call cut short by the request's deadline or a disconnect says nothing about the model
+                if not self._stopped(request):
+                    self.router.record(model, ok=False, fallback=fallback)
+                error = e
+                continue
+            self.router.record(model, ok=True, fallback=fallback)
+            result["usage"] = dict(result["usage"], tier=self.router.tiers.index(model), fallback=fallback)
+            return result
+        raise error
+
+    @staticmethod
+    def _stopped(request: Dict) -> bool:
+        """Whether the request's deadline has passed or its client went away"""
+        cancel = request.get("cancel")
+        if cancel is not None and cancel.is_set():
+            return True
+        return request.get("deadline") is not None and time.monotonic() >= request["deadline"]
@@ -0,0 +1,561 @@
+"""
+Pipeline - Architect -> Coder -> Tester generation and the execute feedback loop
+Shared by every entry point so behaviour and performance fixes live in one place
+"""
+
+import hashlib
+import time
+from typing import Dict, Iterator, Optional
+
+from agents.benchmark import compare, summarize
+from agents.generation_profiles import cache_key, is_cacheable
+from agents.request_context import DeadlineExceeded, RequestContext
+from agents.result_parser import ResultParser
+from agents.session_store import Session
+from agents.test_minimizer import minimize as minimize_tests
+
+
+MODES = ("full", "code_only", "tests_only")
+
+
+class Pipeline:
+    """Runs the agent stages for /generate and /execute"""
+
+    def __init__(self, architect, coder, tester, executor, usage_tracker, cache=None, prompt_index=None):
+        self.architect = architect
+        self.coder = coder
+        self.tester = tester
+        self.executor = executor
+        self.usage_tracker = usage_tracker
+        self.cache = cache
+        self.prompt_index = prompt_index
+
+    def generate(
+        self,
+        prompt: str,
+        description: str,
+        session: Session,
+        context: RequestContext,
+        mode: str = "full",
+        architect: bool = True,
+        code: Optional[str] = None,
+        reuse: str = "off",
+    ) -> Dict:
+        """
+        Generate code and tests for a prompt, running only the selected stages
+
+        Args:
+            prompt: User prompt
+            description: Optional additional requirements
+            session: Session whose conversation and artifacts are updated
+            context: Per-request state
+            mode: "full" (code and tests), "code_only", or "tests_only"
+                (tests for the provided code)
+            architect: Whether to run the architect analysis first
+            code: Existing code to test, required for "tests_only"
+            reuse: What to do with a near-duplicate earlier prompt: "off"
+                only reports it, "reuse" returns its artifacts instead of
+                calling the agents, "seed" gives its code to the coder
+
+        Returns:
+            Dict with status, code, tests, conversation, usage, cache info,
+            the stages that ran and any similar earlier prompt. If the request
+            deadline passes, status is "timeout" and code/tests hold what
+            finished before it.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown pipeline mode: {mode}")
+        if mode == "tests_only" and not code:
+            raise ValueError("tests_only mode requires code")
+
+        conversation = session.conversation
+        cacheable = is_cacheable(context.profile)
+        cached_stages = []
+        stages = []
+        generated_code = code or ""
+        generated_tests = ""
+        architect_analysis = None
+        similar = None
+        index_text = f"{prompt}\n{description}" if description else prompt
+        try:
+            conversation.clear()
+            session.current_prompt = prompt
+            session.current_profile = context.profile
+
+            # tests_only output depends on the provided code, not just the prompt
+            if self.prompt_index is not None and mode != "tests_only":
+                similar = self.prompt_index.lookup(index_text, context.profile, require_tests=mode == "full")
+            reused = similar if reuse == "reuse" else None
+            seed = similar if reuse == "seed" else None
+
+            conversation.add_message(
+                role="user",
+                content=prompt,
+                agent_type="user"
+            )
+
+            if architect:
+                conversation.add_message(
+                    role="system",
+                    content="Architect agent is analyzing requirements...",
+                    agent_type="system"
+                )
+
+                architect_analysis = reused.get("architect") if reused else None
+                if architect_analysis is None:
+                    architect_analysis = self._cached_architect(prompt, context)
+                if architect_analysis is not None:
+                    cached_stages.append("architect")
+                else:
+                    architect_analysis = self.architect.generate(prompt, context=context)
+                    self._store_architect(prompt, context, architect_analysis)
+                stages.append("architect")
+
+                conversation.add_message(
+                    role="architect",
+                    content=architect_analysis,
+                    agent_type="architect"
+                )
+
+            if mode in ("full", "code_only"):
+                coder_prompt = f"{prompt}\n\nAdditional context: {description}" if description else prompt
+                if seed:
+                    coder_prompt += (
+                        "\n\nA similar earlier request was solved with the code below; "
+                        f"reuse what applies:\n{seed['code']}"
+                    )
+
+                conversation.add_message(
+                    role="system",
+                    content="Coder agent is generating code...",
+                    agent_type="system"
+                )
+
+                if reused:
+                    generated_code = reused["code"]
+                    cached_stages.append("coder")
+                else:
+                    generated_code = self.coder.generate(coder_prompt, context=context)
+                stages.append("coder")
+
+                conversation.add_message(
+                    role="coder",
+                    content=generated_code,
+                    agent_type="coder"
+                )
+            session.current_code = generated_code
+
+            if mode in ("full", "tests_only"):
+                conversation.add_message(
+                    role="system",
+                    content="Tester agent is generating tests...",
+                    agent_type="system"
+                )
+
+                test_requirements = f"Test the following code which implements: {prompt}"
+                if reused:
+                    generated_tests = reused["tests"]
+                    cached_stages.append("tester")
+                else:
+                    generated_tests = self.tester.generate(generated_code, test_requirements, context=context)
+                stages.append("tester")
+
+                conversation.add_message(
+                    role="tester",
+                    content=generated_tests,
+                    agent_type="tester"
+                )
+            session.current_tests = generated_tests
+
+            if self.prompt_index is not None and mode != "tests_only" and not reused:
+                self.prompt_index.add_generation(
+                    index_text, context.profile, prompt, architect_analysis, generated_code, generated_tests
+                )
+
+            return {
+                "status": "success",
+                "code": generated_code,
+                "tests": generated_tests,
+                "conversation": list(conversation.get_history()),
+                "usage": self.usage_tracker.record(context.session_id, context.usage),
+                "profile": context.profile,
+                "cacheable": cacheable,
+                "cached_stages": cached_stages,
+                "stages": stages,
+                "similar_prompt": self._similar_summary(similar, reuse)
+            }
+
+        except DeadlineExceeded as e:
+            conversation.add_message(
+                role="system",
+                content=f"Stopped: {str(e)}",
+                agent_type="system"
+            )
+
+            return {
+                "status": "timeout",
+                "code": generated_code,
+                "tests": generated_tests,
+                "conversation": list(conversation.get_history()),
+                "usage": self.usage_tracker.record(context.session_id, context.usage),
+                "profile": context.profile,
+                "cacheable": False,
+                "cached_stages": cached_stages,
+                "stages": stages,
+                "similar_prompt": self._similar_summary(similar, reuse),
+                "deadline_exceeded": True
+            }
+
+        except Exception as e:
+            conversation.add_message(
+                role="system",
+                content=f"Error: {str(e)}",
+                agent_type="system"
+            )
+
+            return {
+                "status": "error",
+                "code": f"# Error: {str(e)}",
+                "tests": f"# Error: {str(e)}",
+                "conversation": list(conversation.get_history()),
+                "usage": self.usage_tracker.record(context.session_id, context.usage),
+                "profile": context.profile,
+                "cacheable": False,
+                "cached_stages": cached_stages,
+                "stages": stages
+            }
+
+    def _cached_architect(self, prompt: str, context: RequestContext):
+        """Reuse the architect analysis of an identical normalized prompt"""
+        if self.cache is None or not is_cacheable(context.profile):
+            return None
+        return self.cache.get(cache_key("architect", context.profile, prompt))
+
+    def _store_architect(self, prompt: str, context: RequestContext, analysis: str):
+        """Cache a deterministic architect analysis unless the call failed"""
+        if self.cache is None or not is_cacheable(context.profile):
+            return
+        if analysis.startswith("Error"):
+            return
+        self.cache.set(cache_key("architect", context.profile, prompt), analysis)
+
+    @staticmethod
+    def _similar_summary(similar: Optional[Dict], reuse: str) -> Optional[Dict]:
+        """Match score and earlier prompt of a near-duplicate, and how it was used"""
+        if similar is None:
+            return None
+        return {"score": similar["score"], "prompt": similar["prompt"], "action": reuse}
+
+    def execute(
+        self,
+        code: str,
+        tests: str,
+        session: Session,
+        context: RequestContext,
+        profiling: bool = False,
+        minimize: bool = False,
+        selection: str = "all",
+    ) -> Dict:
+        """
+        Execute code and tests with feedback loop
+
+        Args:
+            code: Code under test
+            tests: Pytest tests for the code
+            session: Session whose artifacts are updated
+            context: Per-request state
+            profiling: Run the tests under cProfile and tracemalloc
+            minimize: Run the tests under per-test coverage and compute the
+                minimal covering subset
+            selection: "minimized" runs only the session's covering subset
+                when code and tests are unchanged since it was computed
+
+        Returns:
+            Dict with execution status, parsed test results and usage
+        """
+        result = None
+        for event in self.execute_stream(
+            code, tests, session, context, profiling=profiling, minimize=minimize, selection=selection
+        ):
+            if event["event"] == "result":
+                result = event["result"]
+        return result
+
+    def execute_stream(
+        self,
+        code: str,
+        tests: str,
+        session: Session,
+        context: RequestContext,
+        profiling: bool = False,
+        minimize: bool = False,
+        selection: str = "all",
+    ) -> Iterator[Dict]:
+        """
+        Execute code and tests, yielding per-test outcomes as they complete
+
+        Yields:
+            {"event": "started"}, one {"event": "test", ...} per finished test,
+            {"event": "refining"} before a tester refinement, and finally
+            {"event": "result", "result": <same payload as execute>}. The
+            sandbox runs for at most the request's remaining deadline, and the
+            refinement is skipped once the deadline has passed. With profiling,
+            test_details carry each test's duration and peak memory, and the
+            result has a "profiling" section with per-function timings.
+            With minimize, the suite runs once under per-test coverage and the
+            result has a "minimization" section; test_details flag the tests
+            the covering subset leaves out as redundant. With selection
+            "minimized", only that subset runs if the suite is unchanged since.
+        """
+        try:
+            session.current_code = code
+            session.current_tests = tests
+
+            full_test_code = f"{code}\n\n{tests}"
+            suite_hash = hashlib.sha256(full_test_code.encode()).hexdigest()
+            stored = session.test_minimization
+            select = None
+            if selection == "minimized" and stored and stored["suite_hash"] == suite_hash:
+                select = stored["selected"]
+
+            yield {"event": "started"}
+            execution_result = None
+            for event in self.executor.stream(
+                full_test_code,
+                test_mode=True,
+                timeout=context.remaining(),
+                cancel=context.cancel,
+                trace=context.trace,
+                profile=profiling,
+                coverage_lines=code.count("\n") + 1 if minimize else None,
+                select=select,
+            ):
+                if event["type"] == "exit":
+                    execution_result = event
+                    continue
+                detail = ResultParser.parse_test_line(event["line"])
+                if detail:
+                    yield {"event": "test", **detail}
+
+            if execution_result["status"] in ("timeout", "cancelled"):
+                with context.trace.span("result_parser.parse", partial=True) as span:
+                    partial = ResultParser.parse_partial_results(execution_result["stdout"])
+                    span.set(total=partial["total"], passed=partial["passed"], failed=partial["failed"])
+                stopped = "timed out" if execution_result["status"] == "timeout" else "cancelled"
+                yield {"event": "result", "result": {
+                    "status": "error",
+                    "execution_status": execution_result["status"],
+                    "output": execution_result["stdout"],
+                    "error": execution_result["stderr"],
+                    "test_summary": f"Execution {stopped} ({partial['summary']})",
+                    "total_tests": partial["total"],
+                    "passed_tests": partial["passed"],
+                    "failed_tests": partial["failed"],
+                    "test_details": partial["test_details"],
+                    "raw_output": execution_result["stdout"] + execution_result["stderr"],
+                    "deadline_exceeded": context.expired()
+                }}
+                return
+
+            if execution_result["status"] == "error":
+                yield {"event": "result", "result": {
+                    "status": "error",
+                    "execution_status": "error",
+                    "output": execution_result["stdout"],
+                    "error": execution_result["stderr"],
+                    "test_summary": "Execution error",
+                    "total_tests": 0,
+                    "passed_tests": 0,
+                    "failed_tests": 0,
+                    "test_details": [],
+                    "raw_output": execution_result["stderr"]
+                }}
+                return
+
+            with context.trace.span("result_parser.parse", partial=False) as span:
+                parsed_results = ResultParser.parse_test_results(
+                    execution_result["stdout"] + execution_result["stderr"],
+                    execution_result["returncode"]
+                )
+                span.set(total=parsed_results["total"], passed=parsed_results["passed"], failed=parsed_results["failed"])
+
+            test_details = [
+                {
+                    "name": detail["name"],
+                    "status": detail["status"],
+                    "params": detail.get("params", "")
+                }
+                for detail in parsed_results["test_details"]
+            ]
+            report = execution_result.get("profile")
+            if report:
+                for detail in test_details:
+                    test_id = f"{detail['name']}[{detail['params']}]" if detail["params"] else detail["name"]
+                    detail.update(report["tests"].get(test_id, {}))
+
+            minimization = None
+            coverage_report = execution_result.get("coverage")
+            if coverage_report:
+                minimization = minimize_tests(coverage_report)
+                session.test_minimization = {"suite_hash": suite_hash, **minimization}
+                # Runner ids include any class prefix; output lines only name the function
+                redundant = {test_id.rsplit("::", 1)[-1] for test_id in minimization["redundant"]}
+                for detail in test_details:
+                    test_id = f"{detail['name']}[{detail['params']}]" if detail["params"] else detail["name"]
+                    detail["redundant"] = test_id in redundant
+
+            response = {
+                "status": "success" if parsed_results["status"] == "passed" else "failed",
+                "execution_status": parsed_results["status"],
+                "output": execution_result["stdout"],
+                "error": execution_result["stderr"],
+                "test_summary": parsed_results["summary"],
+                "total_tests": parsed_results["total"],
+                "passed_tests": parsed_results["passed"],
+                "failed_tests": parsed_results["failed"],
+                "test_details": test_details,
+                "raw_output": execution_result["stdout"] + execution_result["stderr"]
+            }
+
+            if ResultParser.should_retry(parsed_results) and session.current_prompt and context.expired():
+                response["deadline_exceeded"] = True
+            elif ResultParser.should_retry(parsed_results) and session.current_prompt:
+                feedback_message = f"Tests failed:\n{parsed_results['summary']}\n\nOriginal code:\n{code}\n\nFailing tests:\n{tests}\n\nPlease fix the code to pass all tests."
+
+                yield {"event": "refining"}
+                session.conversation.add_message(
+                    role="system",
+                    content="Tests failed. Tester agent is debugging...",
+                    agent_type="system"
+                )
+
+                context.repair = True
+                try:
+                    with context.llm_slot():
+                        refined_tests = self.tester.generate(code, feedback_message, context=context)
+                except DeadlineExceeded:
+                    response["deadline_exceeded"] = True
+                else:
+                    session.current_tests = refined_tests
+
+                    session.conversation.add_message(
+                        role="tester",
+                        content=f"Refined tests after feedback:\n{refined_tests}",
+                        agent_type="tester"
+                    )
+
+            if report:
+                response["profiling"] = {
+                    "functions": report["functions"],
+                    "process_peak_memory_kib": report["process_peak_memory_kib"],
+                }
+            if minimization:
+                response["minimization"] = minimization
+            if select is not None:
+                response["selection"] = {
+                    "mode": "minimized",
+                    "skipped_tests": len(stored["redundant"]),
+                    "estimated_saved_ms": stored["runtime"]["saved_ms"],
+                    "line_coverage": stored["coverage"]["line_coverage"],
+                }
+            elif selection == "minimized":
+                # A changed suite needs a fresh minimize run first
+                response["selection"] = {"mode": "all", "reason": "no minimization for this code and tests"}
+
+            response["usage"] = self.usage_tracker.record(context.session_id, context.usage)
+            yield {"event": "result", "result": response}
+
+        except Exception as e:
+            yield {"event": "result", "result": {
+                "status": "error",
+                "execution_status": "error",
+                "output": "",
+                "error": str(e),
+                "test_summary": "Error during execution",
+                "total_tests": 0,
+                "passed_tests": 0,
+                "failed_tests": 0,
+                "test_details": [],
+                "raw_output": str(e)
+            }}
+
+    def benchmark(
+        self, code: str, session: Session, context: RequestContext, benchmarks: Optional[str] = None
+    ) -> Dict:
+        """
+        Time code at increasing input sizes and fit its empirical complexity
+
+        Args:
+            code: Code to benchmark
+            session: Session whose benchmark history is compared and extended
+            context: Per-request state
+            benchmarks: bench_<name>(n) functions; defaults to the session's
+                last benchmarks, generated by the tester if there are none
+
+        Returns:
+            Dict with the benchmark code, timing curves and complexity per
+            benchmark, and a comparison against the session's previous run
+        """
+        try:
+            if not benchmarks:
+                benchmarks = session.current_benchmarks
+            if not benchmarks:
+                requirements = f"Benchmark the following code which implements: {session.current_prompt}"
+                with context.llm_slot():
+                    benchmarks = self.tester.generate_benchmarks(code, requirements, context=context)
+            if benchmarks.startswith("# Error"):
+                raise ValueError(benchmarks.splitlines()[0][2:])
+            session.current_benchmarks = benchmarks
+
+            execution_result = self.executor.execute(
+                f"{code}\n\n{benchmarks}",
+                timeout=context.remaining(),
+                cancel=context.cancel,
+                trace=context.trace,
+                benchmark=True,
+            )
+            if not (execution_result.get("benchmark") or {}).get("benchmarks"):
+                return {
+                    "status": "error",
+                    "execution_status": execution_result["status"],
+                    "benchmarks": benchmarks,
+                    "results": {},
+                    "comparison": {},
+                    "error": execution_result["stderr"] or "No bench_ functions found",
+                    "output": execution_result["stdout"],
+                    "usage": self.usage_tracker.record(context.session_id, context.usage),
+                }
+
+            results = summarize(execution_result["benchmark"])
+            previous = session.benchmark_runs[-1]["results"] if session.benchmark_runs else None
+            comparison = compare(previous, results)
+            session.benchmark_runs.append({
+                "code_hash": hashlib.sha256(code.encode()).hexdigest()[:12],
+                "timestamp": time.time(),
+                "results": results,
+            })
+            del session.benchmark_runs[:-Session.MAX_BENCHMARK_RUNS]
+
+            return {
+                "status": "success",
+                "execution_status": execution_result["status"],
+                "benchmarks": benchmarks,
+                "results": results,
+                "comparison": comparison,
+                "regression": any(entry["regression"] for entry in comparison.values()),
+                "run": len(session.benchmark_runs),
+                "output": execution_result["stdout"],
+                "usage": self.usage_tracker.record(context.session_id, context.usage),
+            }
+
+        except Exception as e:
+            return {
+                "status": "error",
+                "execution_status": "error",
+                "benchmarks": benchmarks or "",
+                "results": {},
+                "comparison": {},
+                "error": str(e),
+                "output": "",
+                "usage": self.usage_tracker.record(context.session_id, context.usage),
+            }
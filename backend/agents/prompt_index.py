@@ -0,0 +1,192 @@
+"""
+Prompt Index - Near-duplicate lookup of past prompts with MinHash/LSH
+Fully local: prompts are reduced to stemmed word and character shingles,
+MinHash signatures are bucketed by LSH bands to find candidates, and the
+candidates are scored by exact Jaccard similarity of their shingles
+"""
+
+import hashlib
+import random
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Set, Tuple
+
+# Words that carry no meaning about what to build
+STOPWORDS = {
+    "a", "an", "the", "that", "which", "and", "or", "of", "to", "in", "on", "for", "from", "with",
+    "by", "it", "its", "is", "are", "be", "as", "this", "given", "please", "write", "create",
+    "implement", "make", "build", "function", "python", "code", "program", "me", "i", "we", "can",
+    "you", "should", "will", "some", "into",
+}
+SUFFIXES = ("ing", "ed", "es", "s", "e")
+# Agent outputs that report a failure instead of an artifact
+FAILED_OUTPUT_PREFIXES = ("Error", "# Error", "# Syntax Error")
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _stem(word: str) -> str:
+    # Strip repeatedly so "strings" and "string" both end at the same stem
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in SUFFIXES:
+            if len(word) - len(suffix) >= 3 and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                stripped = True
+                break
+    return word
+
+
+def shingles(text: str) -> Set[str]:
+    """Stemmed content words plus their character trigrams, independent of word order"""
+    words = [_stem(word) for word in re.findall(r"[a-z0-9_]+", text.lower()) if word not in STOPWORDS]
+    result = set(words)
+    for word in words:
+        padded = f"^{word}$"
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class PromptIndex:
+    """LRU-bounded MinHash/LSH index of generated artifacts by prompt"""
+
+    def __init__(self, max_entries: int = 1000, threshold: float = 0.8, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(0)  # fixed, so signatures are stable across processes
+        self._perms = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(MERSENNE_PRIME)) for _ in range(num_perm)]
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[str]] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, items: Set[str]) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "big") for item in items]
+        if not hashes:
+            return [MERSENNE_PRIME] * len(self._perms)
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, profile: str, signature: List[int]) -> List[Tuple]:
+        return [
+            (profile, band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def add(self, text: str, profile: str, artifacts: Dict):
+        """
+        Index the artifacts generated for a prompt
+
+        Args:
+            text: Prompt plus description the artifacts were generated from
+            profile: Generation profile; lookups only match the same profile
+            artifacts: {"prompt", "architect", "code", "tests"}
+        """
+        if self.max_entries <= 0:
+            return
+        items = shingles(text)
+        if not items:
+            return
+        signature = self._signature(items)
+        entry_id = hashlib.sha256(f"{profile}\x00{' '.join(sorted(items))}".encode()).hexdigest()
+        with self._lock:
+            previous = self._entries.get(entry_id)
+            if previous is not None:
+                # A code_only run must not drop tests stored by an earlier full run
+                artifacts = {**previous["artifacts"], **{key: value for key, value in artifacts.items() if value}}
+            self._remove(entry_id)
+            keys = self._band_keys(profile, signature)
+            self._entries[entry_id] = {"shingles": items, "keys": keys, "artifacts": dict(artifacts)}
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def add_generation(
+        self, text: str, profile: str, prompt: str, analysis: Optional[str], code: str, tests: str
+    ) -> bool:
+        """Index a generation unless one of its stages failed; returns whether it was added"""
+        outputs = [code, tests] + ([analysis] if analysis is not None else [])
+        if any(output.startswith(FAILED_OUTPUT_PREFIXES) for output in outputs):
+            return False
+        self.add(text, profile, {"prompt": prompt, "architect": analysis, "code": code, "tests": tests})
+        return True
+
+    def _remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in entry["keys"]:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def lookup(self, text: str, profile: str, require_tests: bool = False) -> Optional[Dict]:
+        """
+        Find the most similar indexed prompt at or above the threshold
+
+        Args:
+            text: Prompt plus description to match
+            profile: Generation profile of the request
+            require_tests: Only match entries that have generated tests
+
+        Returns:
+            {"score": float, **artifacts} for the best match, or None
+        """
+        if self.max_entries <= 0:
+            return None
+        items = shingles(text)
+        if not items:
+            return None
+        keys = self._band_keys(profile, self._signature(items))
+        with self._lock:
+            candidates = set()
+            for key in keys:
+                candidates |= self._buckets.get(key, set())
+            best_id, best_score = None, 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if require_tests and not entry["artifacts"].get("tests"):
+                    continue
+                score = jaccard(items, entry["shingles"])
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return {"score": round(best_score, 4), **self._entries[best_id]["artifacts"]}
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def create_prompt_index(name: str = "memory", **kwargs) -> PromptIndex:
+    """Build the prompt similarity index configured for this deployment"""
+    if name == "memory":
+        return PromptIndex(**kwargs)
+    if name == "none":
+        return PromptIndex(max_entries=0)
+    raise ValueError(f"Unknown prompt index backend: {name}")
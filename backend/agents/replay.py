@@ -0,0 +1,177 @@
+"""
+Replay - Record agent LLM calls and API traffic, and serve them back
+RecordingProvider appends every agent call (prompt, config, output, latency)
+to a JSONL file; ReplayProvider answers from such a file with the original
+or scaled latency, so a run no longer depends on a non-deterministic model.
+TrafficRecorder logs /generate and /execute requests for replay_traffic.py.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, List, Mapping, Optional
+
+from agents.llm_provider import LLMCallError
+from agents.prompt_index import jaccard, shingles
+
+# Headers that change how a request is scheduled, so a replay sends them again
+TRAFFIC_HEADERS = ("x-api-key", "x-priority", "x-deadline-ms")
+
+
+def call_key(request: Dict) -> str:
+    """Identity of an agent call: agent, prompt and generation config (not the routed model)"""
+    material = json.dumps(
+        [request.get("agent"), request.get("prompt"), request.get("config") or {}], sort_keys=True
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+class _JsonlWriter:
+    """Thread-safe append-only JSONL file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = Lock()
+
+    def write(self, record: Dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+class RecordingProvider:
+    """Provider wrapper that records every call and its outcome"""
+
+    def __init__(self, inner, path: str):
+        self.inner = inner
+        self.name = getattr(inner, "name", "recording")
+        self._writer = _JsonlWriter(path)
+
+    def generate(self, request: Dict) -> Dict:
+        start = time.perf_counter()
+        record = {
+            "key": call_key(request),
+            "agent": request.get("agent"),
+            "model": request.get("model"),
+            "prompt": request.get("prompt"),
+            "config": request.get("config") or {},
+            "recorded_at": time.time(),
+        }
+        try:
+            result = self.inner.generate(request)
+        except Exception as e:
+            record.update(
+                error=str(e),
+                usage=getattr(e, "usage", None),
+                latency_ms=round((time.perf_counter() - start) * 1000, 2),
+            )
+            self._writer.write(record)
+            raise
+        record.update(
+            text=result["text"],
+            usage=result["usage"],
+            latency_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+        self._writer.write(record)
+        return result
+
+
+class ReplayProvider:
+    """
+    Serves recorded calls instead of calling a model
+
+    Calls are matched by agent, prompt and config. Repeated identical calls
+    are served in recorded order, cycling once exhausted. A call with no
+    exact match (e.g. a refinement prompt that quotes different test output)
+    gets the recording of the same agent with the most similar prompt.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, latency_scale: float = 1.0):
+        """
+        Args:
+            path: JSONL file written by RecordingProvider
+            latency_scale: Multiplier for recorded latencies; 0 answers at once
+        """
+        if not path or not os.path.exists(path):
+            raise ValueError(f"Replay recording not found: {path}")
+        self.path = path
+        self.latency_scale = latency_scale
+        self._calls: Dict[str, Deque[Dict]] = {}
+        self._by_agent: Dict[str, List[tuple]] = {}
+        self._lock = Lock()
+        self._stats = {"calls": 0, "exact": 0, "nearest": 0, "missing": 0}
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self._calls.setdefault(record["key"], deque()).append(record)
+                self._by_agent.setdefault(record["agent"], []).append((shingles(record["prompt"] or ""), record))
+
+    def _match(self, request: Dict) -> Optional[Dict]:
+        with self._lock:
+            self._stats["calls"] += 1
+            recorded = self._calls.get(call_key(request))
+            if recorded:
+                record = recorded[0]
+                recorded.rotate(-1)
+                self._stats["exact"] += 1
+                return record
+            candidates = self._by_agent.get(request.get("agent"), [])
+            if not candidates:
+                self._stats["missing"] += 1
+                return None
+            self._stats["nearest"] += 1
+        wanted = shingles(request.get("prompt", ""))
+        return max(candidates, key=lambda candidate: jaccard(wanted, candidate[0]))[1]
+
+    def generate(self, request: Dict) -> Dict:
+        """Answer a call from the recording after its (scaled) recorded latency"""
+        record = self._match(request)
+        agent = request.get("agent", "unknown")
+        if record is None:
+            raise LLMCallError(f"No recorded {agent} call to replay")
+        delay = record["latency_ms"] / 1000 * self.latency_scale
+        if request.get("deadline") is not None:
+            remaining = request["deadline"] - time.monotonic()
+            if remaining < delay:
+                time.sleep(max(remaining, 0))
+                raise LLMCallError("Request deadline exceeded during replay", record.get("usage"))
+        time.sleep(delay)
+        usage = dict(record.get("usage") or {}, latency_ms=round(delay * 1000, 2))
+        if record.get("error"):
+            raise LLMCallError(record["error"], usage)
+        return {"text": record["text"], "usage": usage}
+
+    def stats(self) -> Dict:
+        """Calls served by exact and nearest match, and calls with no recording"""
+        with self._lock:
+            return dict(self._stats, recorded_calls=sum(len(records) for records in self._by_agent.values()))
+
+
+class TrafficRecorder:
+    """Logs API requests with their arrival time and latency for replay_traffic.py"""
+
+    def __init__(self, path: str):
+        self._writer = _JsonlWriter(path)
+
+    def record(
+        self, endpoint: str, body: Dict, result: Dict, arrived_at: float, latency_ms: float,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        headers = headers or {}
+        self._writer.write({
+            "at": arrived_at,
+            "endpoint": endpoint,
+            "headers": {name: headers[name] for name in TRAFFIC_HEADERS if name in headers},
+            "body": body,
+            "status": result.get("status"),
+            "latency_ms": round(latency_ms, 2),
+        })
@@ -0,0 +1,72 @@
+"""
+Request Context - Per-request state threaded through the agent pipeline
+Collects usage records without sharing mutable state between requests, and
+carries the request deadline and cancellation flag to every stage
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, List, Optional
+
+from agents.generation_profiles import DEFAULT_PROFILE
+from agents.tracing import NULL_TRACE
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes or its client goes away"""
+
+
+class RequestContext:
+    """State that belongs to a single /generate or /execute request"""
+
+    def __init__(
+        self,
+        session_id: str = "default",
+        profile: str = DEFAULT_PROFILE,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        trace=None,
+        llm_slot: Optional[Callable[[], ContextManager]] = None,
+    ):
+        """
+        Args:
+            session_id: Session the request belongs to
+            profile: Generation profile name
+            deadline: time.monotonic() value after which work is abandoned
+            cancel: Event set when the client disconnects
+            trace: Trace that collects this request's spans (NULL_TRACE if unsampled)
+            llm_slot: Returns a context manager that holds an LLM scheduler
+                slot, for agent calls of a request scheduled on the sandbox
+        """
+        self.session_id = session_id
+        self.profile = profile
+        # Set while refining after ResultParser.should_retry; routes to a stronger model
+        self.repair = False
+        self.usage: List[Dict] = []
+        self.deadline = deadline
+        self.cancel = cancel or threading.Event()
+        self.trace = trace or NULL_TRACE
+        self.llm_slot = llm_slot or nullcontext
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed or the request was cancelled"""
+        return self.cancel.is_set() or self.remaining() == 0.0
+
+    def check(self):
+        """Raise DeadlineExceeded once the request should stop"""
+        if self.cancel.is_set():
+            raise DeadlineExceeded("Request cancelled by client")
+        if self.remaining() == 0.0:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def record_usage(self, usage: Dict):
+        """Remember the usage record of an agent call"""
+        if usage:
+            self.usage.append(usage)
@@ -0,0 +1,62 @@
+"""
+Response Cache - In-process LRU cache with TTL for agent outputs
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 256, ttl: int = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def create_cache(name: str = "memory", **kwargs) -> ResponseCache:
+    """Build the cache configured for this deployment"""
+    if name == "memory":
+        return ResponseCache(**kwargs)
+    if name == "none":
+        return ResponseCache(max_entries=0)
+    raise ValueError(f"Unknown cache backend: {name}")
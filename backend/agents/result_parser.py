@@ -4,11 +4,13 @@ Custom parsing logic for pytest output and error handling
 """
 
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 class ResultParser:
     """Parses code execution and test results"""
+
+    TEST_LINE_PATTERN = re.compile(r"(test_\w+)\s*(?:\[(.*?)\])?\s*(PASSED|FAILED|ERROR)")
     
     @staticmethod
     def parse_test_results(output: str, returncode: int) -> Dict:
@@ -50,6 +52,63 @@ class ResultParser:
         
         return result
     
+    @staticmethod
+    def parse_test_line(line: str) -> Optional[Dict]:
+        """
+        Parse a single line of pytest -v output
+
+        Args:
+            line: One output line, e.g. "file.py::test_add[1-2] PASSED [ 50%]"
+
+        Returns:
+            Dict with name, params and status, or None if the line is not a test result
+        """
+        match = ResultParser.TEST_LINE_PATTERN.search(line)
+        if not match:
+            return None
+        return {
+            "name": match.group(1),
+            "params": match.group(2) or "",
+            "status": match.group(3).lower()
+        }
+
+    @staticmethod
+    def parse_partial_results(output: str) -> Dict:
+        """
+        Count the tests that finished in output cut short (e.g. by a timeout)
+
+        Args:
+            output: Partial pytest -v output without a final summary line
+
+        Returns:
+            Dict with total/passed/failed/errors counts, test_details and summary
+        """
+        test_details = [
+            detail for detail in
+            (ResultParser.parse_test_line(line) for line in output.splitlines())
+            if detail
+        ]
+        passed = sum(1 for detail in test_details if detail["status"] == "passed")
+        failed = sum(1 for detail in test_details if detail["status"] == "failed")
+        errors = sum(1 for detail in test_details if detail["status"] == "error")
+
+        summary_parts = [f"{len(test_details)} finished"]
+        if passed:
+            summary_parts.append(f"{passed} passed")
+        if failed:
+            summary_parts.append(f"{failed} failed")
+        if errors:
+            summary_parts.append(f"{errors} errors")
+
+        return {
+            "total": len(test_details),
+            "passed": passed,
+            "failed": failed,
+            "errors": errors,
+            "test_details": test_details,
+            "summary": ", ".join(summary_parts)
+        }
+
     @staticmethod
     def parse_execution_results(stdout: str, stderr: str, returncode: int) -> Dict:
         """
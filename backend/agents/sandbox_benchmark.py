@@ -0,0 +1,76 @@
+"""
+Sandbox Benchmark - Times bench_* functions at doubling input sizes
+Executed inside the sandbox subprocess by CodeExecutor in benchmark mode.
+Each bench_<name>(n) builds an input of size n and returns a zero-argument
+callable; only the callable is timed.
+
+Usage: python sandbox_benchmark.py <bench_file> <report_json> <min_n> <max_n> <budget_seconds>
+"""
+
+import importlib.util
+import json
+import sys
+import time
+
+MIN_SAMPLE_SECONDS = 0.02  # loop a call until a sample lasts at least this long
+REPEATS = 3  # samples per size; the fastest is kept
+
+
+def time_call(function) -> float:
+    """Best per-call time in seconds over REPEATS samples"""
+    best = None
+    for _ in range(REPEATS):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE_SECONDS:
+                break
+        per_call = elapsed / loops
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+
+def main(path: str, report_path: str, min_n: int, max_n: int, budget: float) -> int:
+    spec = importlib.util.spec_from_file_location("bench_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    benches = {
+        name[len("bench_"):]: function
+        for name, function in vars(module).items()
+        if name.startswith("bench_") and callable(function)
+    }
+    deadline = time.perf_counter() + budget
+    share = budget / max(len(benches), 1)
+
+    results = {}
+    for name, bench in benches.items():
+        stop_at = min(deadline, time.perf_counter() + share)
+        points = []
+        error = None
+        n = min_n
+        while n <= max_n and time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                seconds = time_call(bench(n))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                break
+            points.append({"n": n, "seconds": seconds})
+            print(f"BENCH {name} n={n} {seconds * 1000:.4f}ms", flush=True)
+            # Doubling n costs at least twice as long; stop if that will not fit
+            if time.perf_counter() + 2 * (time.perf_counter() - started) > stop_at:
+                break
+            n *= 2
+        results[name] = {"points": points, "error": error}
+
+    with open(report_path, "w") as report:
+        json.dump({"benchmarks": results}, report)
+    return 0 if benches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), float(sys.argv[5])))
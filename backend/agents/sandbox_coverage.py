@@ -0,0 +1,140 @@
+"""
+Sandbox Coverage - Runs a pytest file recording per-test line and branch coverage
+Executed inside the sandbox subprocess by CodeExecutor when test minimization
+is requested. Only the code under test (the first <code_lines> lines of the
+file) is measured; branches are recorded as line-to-line arcs with a
+sys.settrace tracer, so no coverage package is needed in the sandbox.
+
+Usage: python sandbox_coverage.py <test_file> <report_json> <code_lines>
+"""
+
+import ast
+import json
+import sys
+import time
+
+import pytest
+
+
+def executable_lines(path: str, code_lines: int) -> set:
+    """Lines inside functions of the code under test that can execute"""
+    with open(path) as source:
+        module = compile(source.read(), path, "exec")
+    lines = set()
+    pending = [const for const in module.co_consts if hasattr(const, "co_lines")]
+    while pending:
+        code = pending.pop()
+        if code.co_firstlineno > code_lines:
+            continue
+        lines.update(line for _, _, line in code.co_lines() if line and line <= code_lines)
+        pending.extend(const for const in code.co_consts if hasattr(const, "co_lines"))
+    # The def line itself runs at import time, not inside a test
+    return lines - _definition_lines(path, code_lines)
+
+
+def _definition_lines(path: str, code_lines: int) -> set:
+    with open(path) as source:
+        tree = ast.parse(source.read())
+    return {
+        node.lineno for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)) and node.lineno <= code_lines
+    }
+
+
+def assertion_targets(path: str, code_lines: int) -> dict:
+    """Names of the functions each test calls inside assert statements or pytest.raises blocks"""
+    with open(path) as source:
+        tree = ast.parse(source.read())
+    targets = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) or node.lineno <= code_lines:
+            continue
+        if not node.name.startswith("test"):
+            continue
+        checked = []
+        for inner in ast.walk(node):
+            if isinstance(inner, ast.Assert):
+                checked.append(inner.test)
+            elif isinstance(inner, ast.With) and any("raises" in ast.unparse(item.context_expr) for item in inner.items):
+                checked.extend(inner.body)
+        names = set()
+        for expression in checked:
+            for call in ast.walk(expression):
+                if isinstance(call, ast.Call):
+                    func = call.func
+                    name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+                    if name:
+                        names.add(name)
+        targets[node.name] = sorted(names)
+    return targets
+
+
+class _PerTestCoverage:
+    """pytest plugin tracing the lines and arcs of the code under test per test"""
+
+    def __init__(self, path: str, code_lines: int):
+        self.path = path
+        self.code_lines = code_lines
+        self.tests = {}
+        self._lines = set()
+        self._arcs = set()
+
+    def _trace(self, frame, event, arg):
+        code = frame.f_code
+        if code.co_filename != self.path or code.co_firstlineno > self.code_lines:
+            return None
+        last = [-code.co_firstlineno]
+
+        def local(frame, event, arg):
+            if event == "line":
+                self._lines.add(frame.f_lineno)
+                self._arcs.add((last[0], frame.f_lineno))
+                last[0] = frame.f_lineno
+            elif event == "return":
+                self._arcs.add((last[0], -code.co_firstlineno))
+            return local
+
+        return local
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        self._lines, self._arcs = set(), set()
+        start = time.perf_counter()
+        sys.settrace(self._trace)
+        try:
+            yield
+        finally:
+            sys.settrace(None)
+        self.tests[item.nodeid.split("::", 1)[1]] = {
+            "function": getattr(item, "originalname", None) or item.name,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "lines": sorted(self._lines),
+            "arcs": sorted(self._arcs),
+        }
+
+    def pytest_runtest_logreport(self, report):
+        if report.when == "call" or report.outcome != "passed":
+            test = self.tests.setdefault(report.nodeid.split("::", 1)[1], {
+                "function": report.nodeid.split("::")[-1].split("[")[0],
+                "duration_ms": 0.0,
+                "lines": [],
+                "arcs": [],
+            })
+            if report.outcome != "passed" or "outcome" not in test:
+                test["outcome"] = report.outcome
+
+
+def main(test_file: str, report_path: str, code_lines: int) -> int:
+    plugin = _PerTestCoverage(test_file, code_lines)
+    exit_code = pytest.main([test_file, "-v", "-p", "no:cacheprovider"], plugins=[plugin])
+    with open(report_path, "w") as report:
+        json.dump({
+            "tests": plugin.tests,
+            "executable_lines": sorted(executable_lines(test_file, code_lines)),
+            "assertion_targets": assertion_targets(test_file, code_lines),
+        }, report)
+    return int(exit_code)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1], sys.argv[2], int(sys.argv[3])))
@@ -0,0 +1,79 @@
+"""
+Sandbox Profile - Runs a pytest file under cProfile and tracemalloc
+Executed inside the sandbox subprocess by CodeExecutor when profiling is
+requested. Only functions defined in the tested file are reported, so
+pytest internals stay out of the numbers.
+
+Usage: python sandbox_profile.py <test_file> <report_json>
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+TOP_FUNCTIONS = 30
+
+
+class _PerTestMemory:
+    """pytest plugin recording the duration and peak traced memory of each test call"""
+
+    def __init__(self):
+        self.tests = {}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        self.tests[item.name] = {
+            "duration_ms": round(elapsed * 1000, 3),
+            "peak_memory_kib": round(max(peak - baseline, 0) / 1024, 2),
+        }
+
+
+def main(test_file: str, report_path: str) -> int:
+    plugin = _PerTestMemory()
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        exit_code = pytest.main([test_file, "-v", "-p", "no:cacheprovider"], plugins=[plugin])
+    finally:
+        profiler.disable()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    functions = []
+    for (filename, line, name), (primitive, calls, own, cumulative, _) in pstats.Stats(profiler).stats.items():
+        if filename != test_file:
+            continue
+        functions.append({
+            "function": name,
+            "line": line,
+            "kind": "test" if name.startswith("test_") else "code",
+            "calls": calls,
+            "primitive_calls": primitive,
+            "own_time_ms": round(own * 1000, 3),
+            "cumulative_time_ms": round(cumulative * 1000, 3),
+        })
+    functions.sort(key=lambda entry: entry["cumulative_time_ms"], reverse=True)
+
+    with open(report_path, "w") as report:
+        json.dump({
+            "functions": functions[:TOP_FUNCTIONS],
+            "tests": plugin.tests,
+            "process_peak_memory_kib": round(peak / 1024, 2),
+        }, report)
+    return int(exit_code)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,221 @@
+"""
+Fair Scheduler - Weighted fair queuing of LLM and sandbox slots across clients
+Interactive requests are served ahead of bulk ones, bulk still gets a
+guaranteed share, and each client has a concurrency cap so one batch
+script cannot starve everyone else
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional
+
+LANES = ("interactive", "bulk")
+
+
+class _Waiter:
+    def __init__(self, client: str, lane: str, finish: float, sequence: int):
+        self.client = client
+        self.lane = lane
+        self.finish = finish
+        self.sequence = sequence
+        self.enqueued_at = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def sort_key(self):
+        return (self.finish, self.sequence)
+
+
+class _Resource:
+    """Slots of one kind (e.g. "llm" or "sandbox") and their wait queue"""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self.in_use = 0
+        self.virtual_time = 0.0
+        self.waiting: List[_Waiter] = []
+        self.active: Dict[str, int] = {}
+        self.last_finish: Dict[str, float] = {}
+        self.service_ms = 1000.0  # EWMA of slot hold time, seeded by the first sample
+        self.interactive_streak = 0
+        self.served = 0
+
+
+class Ticket:
+    """Where a request stood in the queue and how long it waited"""
+
+    def __init__(self, resource: str, client: str, lane: str, position: int, estimated_wait_ms: float):
+        self.resource = resource
+        self.client = client
+        self.lane = lane
+        self.queue_position = position
+        self.estimated_wait_ms = estimated_wait_ms
+        self.waited_ms = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "resource": self.resource,
+            "client": self.client,
+            "lane": self.lane,
+            "queue_position": self.queue_position,
+            "estimated_wait_ms": round(self.estimated_wait_ms, 2),
+            "waited_ms": round(self.waited_ms, 2),
+        }
+
+
+class FairScheduler:
+    """
+    Hands out slots per resource using weighted fair queuing per client
+
+    Must be used from a single event loop; state is only touched on that loop.
+    """
+
+    def __init__(
+        self,
+        capacities: Dict[str, int],
+        per_client_limit: int = 4,
+        weights: Optional[Dict[str, float]] = None,
+        bulk_share: int = 5,
+    ):
+        """
+        Args:
+            capacities: Concurrent slots per resource, e.g. {"llm": 8, "sandbox": 4}
+            per_client_limit: Max slots one client may hold per resource
+            weights: Per-client weights (default 1.0); higher gets a larger share
+            bulk_share: A waiting bulk request is served at least once every
+                bulk_share dispatches, even while interactive requests wait
+        """
+        self.resources = {name: _Resource(name, capacity) for name, capacity in capacities.items()}
+        self.per_client_limit = per_client_limit
+        self.weights = weights or {}
+        self.bulk_share = bulk_share
+        self._sequence = itertools.count()
+
+    @asynccontextmanager
+    async def slot(
+        self, resource: str, client: str, lane: str = "interactive", on_queued: Optional[Callable[[Ticket], None]] = None
+    ):
+        """
+        Wait for a slot of a resource, hold it for the body of the block
+
+        Args:
+            on_queued: Called with the ticket when the request has to wait,
+                before the wait starts
+
+        Yields:
+            Ticket with queue position, estimated wait and actual wait
+        """
+        state = self.resources[resource]
+        lane = lane if lane in LANES else "interactive"
+        weight = self.weights.get(client, 1.0)
+
+        start = max(state.virtual_time, state.last_finish.get(client, 0.0))
+        waiter = _Waiter(client, lane, start + 1.0 / weight, next(self._sequence))
+        state.last_finish[client] = waiter.finish
+        state.waiting.append(waiter)
+
+        position = self._position(state, waiter)
+        ticket = Ticket(resource, client, lane, position, self._estimate_wait(state, position))
+        self._dispatch(state)
+        if on_queued is not None and not waiter.future.done():
+            on_queued(ticket)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in state.waiting:
+                state.waiting.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self._release(state, client, 0.0)
+            raise
+
+        acquired_at = time.monotonic()
+        ticket.waited_ms = (acquired_at - waiter.enqueued_at) * 1000
+        try:
+            yield ticket
+        finally:
+            self._release(state, client, (time.monotonic() - acquired_at) * 1000)
+
+    def stats(self) -> Dict:
+        """Queue lengths, slot usage and per-client activity per resource"""
+        return {
+            name: {
+                "capacity": state.capacity,
+                "in_use": state.in_use,
+                "waiting": {lane: sum(1 for w in state.waiting if w.lane == lane) for lane in LANES},
+                "active_clients": {client: count for client, count in state.active.items() if count},
+                "served": state.served,
+                "avg_service_ms": round(state.service_ms, 2),
+            }
+            for name, state in self.resources.items()
+        }
+
+    def _eligible(self, state: _Resource, lane: str) -> List[_Waiter]:
+        return sorted(
+            (w for w in state.waiting
+             if w.lane == lane and state.active.get(w.client, 0) < self.per_client_limit),
+            key=_Waiter.sort_key
+        )
+
+    def _next(self, state: _Resource) -> Optional[_Waiter]:
+        interactive = self._eligible(state, "interactive")
+        bulk = self._eligible(state, "bulk")
+        if bulk and (not interactive or state.interactive_streak >= self.bulk_share - 1):
+            state.interactive_streak = 0
+            return bulk[0]
+        if interactive:
+            state.interactive_streak += 1
+            return interactive[0]
+        return None
+
+    def _dispatch(self, state: _Resource):
+        while state.in_use < state.capacity:
+            waiter = self._next(state)
+            if waiter is None:
+                return
+            state.waiting.remove(waiter)
+            if waiter.future.cancelled():
+                continue
+            state.in_use += 1
+            state.active[waiter.client] = state.active.get(waiter.client, 0) + 1
+            state.virtual_time = max(state.virtual_time, waiter.finish - 1.0 / self.weights.get(waiter.client, 1.0))
+            waiter.future.set_result(None)
+
+    def _release(self, state: _Resource, client: str, held_ms: float):
+        state.in_use -= 1
+        state.active[client] = state.active.get(client, 1) - 1
+        if held_ms:
+            state.served += 1
+            state.service_ms = held_ms if state.served == 1 else 0.8 * state.service_ms + 0.2 * held_ms
+        self._dispatch(state)
+        self._forget_idle(state)
+
+    def _forget_idle(self, state: _Resource):
+        """
+        Drop the state of clients that hold and wait for no slot, once it can
+        no longer change their place: their finish tag is behind virtual time,
+        or nobody waits at all. Keeps the per-client dicts bounded.
+        """
+        waiting = {w.client for w in state.waiting}
+        for client in [client for client, count in state.active.items() if count <= 0]:
+            del state.active[client]
+        for client in [client for client in state.last_finish if client not in waiting and client not in state.active]:
+            if not state.waiting or state.last_finish[client] <= state.virtual_time:
+                del state.last_finish[client]
+
+    def _position(self, state: _Resource, waiter: _Waiter) -> int:
+        """Waiters expected to be served before this one"""
+        if waiter.lane == "interactive":
+            ahead = [w for w in state.waiting if w.lane == "interactive" and w.sort_key() < waiter.sort_key()]
+        else:
+            ahead = [w for w in state.waiting
+                     if w.lane == "interactive" or w.sort_key() < waiter.sort_key()]
+        return len(ahead)
+
+    def _estimate_wait(self, state: _Resource, position: int) -> float:
+        if state.in_use + position < state.capacity:
+            return 0.0
+        rounds = (position + state.in_use - state.capacity) // state.capacity + 1
+        return rounds * state.service_ms
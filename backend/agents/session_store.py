@@ -0,0 +1,68 @@
+"""
+Session Store - Keeps per-session conversation and generated artifacts
+Replaces the module-level current_code/current_tests globals
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from agents.conversation_manager import ConversationManager
+from agents.generation_profiles import DEFAULT_PROFILE
+
+
+class Session:
+    """Conversation and latest artifacts of one client session"""
+
+    MAX_BENCHMARK_RUNS = 10
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.conversation = ConversationManager()
+        self.current_code = ""
+        self.current_tests = ""
+        self.current_prompt = ""
+        self.current_profile = DEFAULT_PROFILE
+        self.current_benchmarks = ""
+        # Most recent benchmark runs, oldest first, for regression comparison
+        self.benchmark_runs = []
+        # Covering subset of the last minimized suite, reused by fast runs
+        self.test_minimization = None
+        # Taken by the request handlers, so requests of one session, which
+        # share the conversation and current artifacts, run one at a time
+        self.lock = asyncio.Lock()
+        self.updated_at = time.time()
+
+
+class InMemorySessionStore:
+    """LRU-bounded in-process session store"""
+
+    def __init__(self, max_sessions: int = 1000):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, session_id: str) -> Session:
+        """Get a session, creating it if needed"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.updated_at = time.time()
+            return session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def create_session_store(name: str = "memory", **kwargs):
+    """Build the session store configured for this deployment"""
+    if name == "memory":
+        return InMemorySessionStore(**kwargs)
+    raise ValueError(f"Unknown session store: {name}")
@@ -0,0 +1,83 @@
+"""
+Test Minimizer - Picks a small subset of tests that keeps the suite's coverage
+Works on the per-test report from sandbox_coverage.py: a greedy set cover
+over covered lines, branch arcs and assertion targets, keeping every
+failing test
+"""
+
+from typing import Dict, List, Set, Tuple
+
+
+def _elements(test: Dict, targets: List[str]) -> Set[Tuple]:
+    elements = {("line", line) for line in test["lines"]}
+    elements.update(("arc", tuple(arc)) for arc in test["arcs"])
+    elements.update(("target", name) for name in targets)
+    return elements
+
+
+def minimize(report: Dict) -> Dict:
+    """
+    Compute a minimal covering subset of tests
+
+    Args:
+        report: Runner report with per-test lines, arcs, outcome and duration,
+            the executable lines of the code and each test's assertion targets
+
+    Returns:
+        Dict with the selected and redundant test ids, coverage of the full
+        and selected sets, and the runtime the selected set saves
+    """
+    tests = report["tests"]
+    targets = report.get("assertion_targets", {})
+    elements = {
+        test_id: _elements(test, targets.get(test["function"], []))
+        for test_id, test in tests.items()
+    }
+
+    # Failing tests always stay: they are the signal the user needs
+    selected = [test_id for test_id, test in tests.items() if test.get("outcome") == "failed"]
+    covered: Set[Tuple] = set().union(*(elements[test_id] for test_id in selected)) if selected else set()
+    remaining = set().union(*elements.values()) - covered if elements else set()
+
+    candidates = [test_id for test_id in tests if test_id not in selected]
+    while remaining:
+        # Most new elements first; cheaper test on ties
+        best = max(
+            candidates,
+            key=lambda test_id: (len(elements[test_id] & remaining), -tests[test_id]["duration_ms"])
+        )
+        gain = elements[best] & remaining
+        if not gain:
+            break
+        selected.append(best)
+        candidates.remove(best)
+        covered |= gain
+        remaining -= gain
+
+    redundant = [test_id for test_id in tests if test_id not in selected]
+    executable = set(report.get("executable_lines", []))
+    all_lines = {line for test in tests.values() for line in test["lines"]}
+    all_arcs = {tuple(arc) for test in tests.values() for arc in test["arcs"]}
+    selected_lines = {line for test_id in selected for line in tests[test_id]["lines"]}
+    selected_arcs = {tuple(arc) for test_id in selected for arc in tests[test_id]["arcs"]}
+    full_ms = sum(test["duration_ms"] for test in tests.values())
+    saved_ms = sum(tests[test_id]["duration_ms"] for test_id in redundant)
+
+    return {
+        "selected": selected,
+        "redundant": redundant,
+        "coverage": {
+            "executable_lines": len(executable),
+            "covered_lines": len(all_lines & executable) if executable else len(all_lines),
+            "line_coverage": round(len(all_lines & executable) / len(executable), 4) if executable else None,
+            "covered_arcs": len(all_arcs),
+            "selected_covered_lines": len(selected_lines & executable) if executable else len(selected_lines),
+            "selected_covered_arcs": len(selected_arcs),
+        },
+        "runtime": {
+            "full_ms": round(full_ms, 3),
+            "selected_ms": round(full_ms - saved_ms, 3),
+            "saved_ms": round(saved_ms, 3),
+            "saved_ratio": round(saved_ms / full_ms, 4) if full_ms else 0,
+        },
+    }
@@ -3,19 +3,21 @@ Tester Agent - Generates test cases using LangChain and Gemini
 Custom test template generation and assertion builders
 """
 
-import google.generativeai as genai
-import os
 import re
 import ast
+from typing import Optional
+
+from agents.generation_profiles import DEFAULT_PROFILE, get_generation_config
+from agents.llm_provider import GeminiProvider
+from agents.request_context import DeadlineExceeded, RequestContext
+from agents.tracing import NULL_TRACE
 
 
 class TesterAgent:
     """Agent responsible for generating test cases"""
     
-    def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+    def __init__(self, provider=None):
+        self.provider = provider or GeminiProvider()
         
         self.prompt_template = """You are an expert Python test developer. Generate comprehensive test cases using pytest.
 
@@ -44,21 +46,86 @@ Test Structure:
 - Use pytest fixtures if needed for setup/teardown
 
 Generate ONLY the Python test code, no explanations or markdown:"""
+
+        self.benchmark_template = """You are an expert Python performance engineer. Write input-size benchmarks for the code below.
+
+Code to Benchmark:
+{code}
+
+Requirements: {requirements}
+
+IMPORTANT:
+- DO NOT include import statements for the code being benchmarked (it will be in the same file)
+- For each public function, write def bench_<function>(n): that builds a representative input of size n
+  and returns a zero-argument lambda that calls the function once on that input
+- Build the input outside the lambda so only the call is timed
+- If the function mutates its input, copy it inside the lambda
+- Inputs must stay valid for any n from 16 to 1,000,000
+- Only import standard library modules (e.g. random) if needed
+
+Example:
+def bench_sort_numbers(n):
+    data = [random.randint(0, n) for _ in range(n)]
+    return lambda: sort_numbers(list(data))
+
+Generate ONLY the Python benchmark code, no explanations or markdown:"""
     
-    def generate(self, code: str, requirements: str = "") -> str:
+    def generate(self, code: str, requirements: str = "", context: Optional[RequestContext] = None) -> str:
         """Generate test cases for given code"""
         try:
             prompt = self.prompt_template.format(code=code, requirements=requirements)
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                )
-            )
-            tests = response.text
-            return self._format_and_validate_tests(tests)
+            return self._generate(prompt, code, requirements, context, self._format_and_validate_tests)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return f"# Error generating tests: {str(e)}"
+
+    def generate_benchmarks(self, code: str, requirements: str = "", context: Optional[RequestContext] = None) -> str:
+        """Generate bench_<name>(n) input-size benchmarks for given code"""
+        try:
+            prompt = self.benchmark_template.format(code=code, requirements=requirements)
+            return self._generate(prompt, code, requirements, context, self._format_benchmarks)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return f"# Error generating benchmarks: {str(e)}"
+
+    def _generate(self, prompt: str, code: str, requirements: str, context: Optional[RequestContext], formatter) -> str:
+        """Run one tester call and post-process its output"""
+        trace = context.trace if context else NULL_TRACE
+        try:
+            if context:
+                context.check()
+            with trace.span("agent.tester", prompt_chars=len(prompt)) as span:
+                result = self.provider.generate({
+                    "agent": "tester",
+                    "prompt": prompt,
+                    "config": get_generation_config(context.profile if context else DEFAULT_PROFILE, "tester"),
+                    "deadline": context.deadline if context else None,
+                    "cancel": context.cancel if context else None,
+                    "session_id": context.session_id if context else None,
+                    "hints": {
+                        "input_chars": len(requirements),
+                        "code_chars": len(code),
+                        "repair": bool(context and context.repair),
+                    },
+                })
+                span.set(**result["usage"], output_chars=len(result["text"]))
+            if context:
+                context.record_usage(result["usage"])
+            tests = result["text"]
+            with trace.span("postprocess.tester", input_chars=len(tests)) as span:
+                tests = formatter(tests)
+                span.set(output_chars=len(tests))
+            return tests
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if context:
+                context.record_usage(getattr(e, "usage", None))
+            if context and context.expired():
+                raise DeadlineExceeded(str(e)) from e
+            raise
     
     def _format_and_validate_tests(self, tests: str) -> str:
         """Format and validate test code"""
@@ -74,9 +141,19 @@ Generate ONLY the Python test code, no explanations or markdown:"""
         
         return tests
     
+    def _format_benchmarks(self, benchmarks: str) -> str:
+        """Format and validate benchmark code"""
+        benchmarks = benchmarks.strip()
+        if not benchmarks:
+            return "# Error: No benchmarks generated"
+
+        benchmarks = self._extract_code_blocks(benchmarks)
+        benchmarks = self._remove_module_imports(benchmarks)
+        return self._validate_test_syntax(benchmarks)
+    
     def _extract_code_blocks(self, text: str) -> str:
         """Extract code from markdown code blocks if present"""
-        code_block_match = re.search(r'```(?:python)?\n(.*?)\n```', text, re.DOTALL)
+        code_block_match = re.search(r'```(?:python)?\n(.*?)(?:\n```|\Z)', text, re.DOTALL)
         if code_block_match:
             return code_block_match.group(1).strip()
         return text
@@ -0,0 +1,255 @@
+"""
+Tracing - Lightweight per-request traces for /generate and /execute
+Each sampled request gets a trace id and timed spans for agent calls,
+post-processing, sandbox work and result parsing. Finished traces go to a
+rotating JSONL file or an OTLP/HTTP collector.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("pochita.tracing")
+
+
+class Span:
+    """A timed operation inside a trace"""
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str], attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        """Add attributes, e.g. output size or return code once known"""
+        self.attributes.update(attributes)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NullSpan:
+    """Span of an unsampled request; every operation is a no-op"""
+
+    trace_id = None
+    error = None
+
+    def set(self, **attributes):
+        pass
+
+    def end(self):
+        pass
+
+
+class Trace:
+    """Spans of one request; exported when the root span finishes"""
+
+    sampled = True
+
+    def __init__(self, name: str, exporter, attributes: Dict):
+        self.trace_id = uuid.uuid4().hex
+        self.exporter = exporter
+        self.root = Span(self.trace_id, name, None, attributes)
+        self.spans: List[Span] = [self.root]
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, **attributes) -> Span:
+        """Start a child span of the root span; the caller must end() it"""
+        span = Span(self.trace_id, name, self.root.span_id, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a child of the request's root span"""
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end()
+
+    def finish(self, **attributes):
+        """End the root span and hand the trace to the exporter (once)"""
+        if self.root.end_ns is not None:
+            return
+        self.root.set(**attributes)
+        self.root.end()
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans if span.end_ns is not None]
+        try:
+            self.exporter.export(spans)
+        except Exception:
+            logger.exception("Failed to export trace %s", self.trace_id)
+
+
+class _NullTrace:
+    """Trace of an unsampled request"""
+
+    sampled = False
+    trace_id = None
+    _span = _NullSpan()
+
+    def start_span(self, name: str, **attributes):
+        return self._span
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        yield self._span
+
+    def finish(self, **attributes):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Tracer:
+    """Starts sampled traces and sends them to an exporter"""
+
+    def __init__(self, exporter, sample_rate: float = 1.0):
+        """
+        Args:
+            exporter: Object with export(spans: List[Dict])
+            sample_rate: Fraction of requests traced (0 to 1)
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start(self, name: str, **attributes):
+        """Start a trace for a request, or return NULL_TRACE if not sampled"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return NULL_TRACE
+        return Trace(name, self.exporter, attributes)
+
+
+class JsonlExporter:
+    """Appends one JSON line per span to a size-rotated local file"""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 3):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._writer = logging.getLogger(f"pochita.tracing.jsonl.{path}")
+        self._writer.propagate = False
+        self._writer.setLevel(logging.INFO)
+        self._writer.handlers = [handler]
+        self.path = path
+
+    def export(self, spans: List[Dict]):
+        for span in spans:
+            self._writer.info(json.dumps(span, default=str))
+
+
+class OtlpHttpExporter:
+    """
+    Posts traces as OTLP/HTTP JSON to a collector (e.g. an OpenTelemetry
+    Collector on localhost:4318) from a background thread
+    """
+
+    MAX_PENDING = 1000  # traces dropped beyond this backlog
+
+    def __init__(self, endpoint: str = "http://localhost:4318", service_name: str = "pochita", timeout: float = 5):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+        self._pending: "queue.Queue[List[Dict]]" = queue.Queue(maxsize=self.MAX_PENDING)
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+
+    def export(self, spans: List[Dict]):
+        try:
+            self._pending.put_nowait(spans)
+        except queue.Full:
+            logger.warning("Trace export backlog full; dropping trace")
+
+    def _run(self):
+        while True:
+            spans = self._pending.get()
+            body = json.dumps(self._payload(spans)).encode()
+            request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except Exception as e:
+                logger.warning("Trace export to %s failed: %s", self.url, e)
+
+    def _payload(self, spans: List[Dict]) -> Dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "pochita"},
+                "spans": [
+                    {
+                        "traceId": span["trace_id"],
+                        "spanId": span["span_id"],
+                        "parentSpanId": span["parent_id"] or "",
+                        "name": span["name"],
+                        "kind": 1,
+                        "startTimeUnixNano": str(span["start_ns"]),
+                        "endTimeUnixNano": str(span["end_ns"]),
+                        "attributes": [_attribute(key, value) for key, value in span["attributes"].items()],
+                        "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+                    }
+                    for span in spans
+                ],
+            }],
+        }]}
+
+
+def _attribute(key: str, value) -> Dict:
+    """Encode a span attribute as an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def create_tracer(
+    name: str = "none",
+    sample_rate: float = 1.0,
+    path: str = "traces.jsonl",
+    max_bytes: int = 10 * 1024 * 1024,
+    backups: int = 3,
+    endpoint: str = "http://localhost:4318",
+) -> Optional[Tracer]:
+    """Build the tracer configured for this deployment; None disables tracing"""
+    if name == "none":
+        return None
+    if name == "jsonl":
+        return Tracer(JsonlExporter(path, max_bytes=max_bytes, backups=backups), sample_rate)
+    if name == "otlp":
+        return Tracer(OtlpHttpExporter(endpoint), sample_rate)
+    raise ValueError(f"Unknown tracing exporter: {name}")
@@ -0,0 +1,192 @@
+"""
+Usage Tracker - Records token usage, latency and cost of agent LLM calls
+Aggregates usage per request, per session and as rolling totals
+"""
+
+import os
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+def extract_usage(response, agent: str, model: str, latency: float) -> Dict:
+    """
+    Build a usage record from a generate_content response
+
+    Args:
+        response: Gemini response object (may be None if the call failed)
+        agent: Name of the agent that issued the call
+        model: Model name used for the call
+        latency: Wall-clock seconds spent in generate_content
+
+    Returns:
+        Dict with prompt/completion/total tokens and latency in ms
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    completion_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+    total_tokens = getattr(metadata, "total_token_count", 0) or (prompt_tokens + completion_tokens)
+
+    return {
+        "agent": agent,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+        "latency_ms": round(latency * 1000, 2),
+    }
+
+
+class UsageTracker:
+    """Aggregates agent usage records per request, per session and globally"""
+
+    ROLLING_WINDOW = 3600  # seconds
+
+    def __init__(self, rolling_window: int = ROLLING_WINDOW, max_sessions: int = 1000):
+        self.rolling_window = rolling_window
+        self.max_sessions = max_sessions
+        self.input_cost_per_mtok = float(os.getenv("GEMINI_INPUT_COST_PER_MTOK", "0.10"))
+        self.output_cost_per_mtok = float(os.getenv("GEMINI_OUTPUT_COST_PER_MTOK", "0.40"))
+        # Session ids are client-chosen, so keep only the most recently used
+        self.sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self.totals = self._empty_totals()
+        # (time, usage records, requests they belong to)
+        self._recent: Deque[Tuple[float, List[Dict], int]] = deque()
+        self._lock = Lock()
+
+    def record(self, session_id: str, records: List[Dict]) -> Dict:
+        """
+        Record the agent calls made while serving one request
+
+        Args:
+            session_id: Session the request belongs to
+            records: Usage records produced by the agents
+
+        Returns:
+            Summary of the request's usage
+        """
+        records = [record for record in records if record]
+        summary = self.summarize(records)
+        now = time.time()
+
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = self._empty_totals()
+                while len(self.sessions) > self.max_sessions:
+                    self.sessions.popitem(last=False)
+            else:
+                self.sessions.move_to_end(session_id)
+            for record in records:
+                self._add(session, record)
+                self._add(self.totals, record)
+            self._recent.append((now, records, 1))
+            session["requests"] += 1
+            self.totals["requests"] += 1
+            self._prune(now)
+
+        return summary
+
+    def record_calls(self, session_id: str, records: List[Dict]):
+        """
+        Add agent calls that finished after their request was recorded, e.g.
+        hedge losers; they count towards tokens and cost but not requests
+        """
+        records = [record for record in records if record]
+        now = time.time()
+        with self._lock:
+            session = self.sessions.get(session_id)
+            for record in records:
+                if session is not None:
+                    self._add(session, record)
+                self._add(self.totals, record)
+            self._recent.append((now, records, 0))
+            self._prune(now)
+
+    def summarize(self, records: List[Dict]) -> Dict:
+        """Summarize a list of usage records"""
+        summary = self._empty_totals()
+        for record in records:
+            self._add(summary, record)
+        summary["requests"] = 1
+        summary["calls"] = records
+        return summary
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        """Get aggregated usage for a session"""
+        with self._lock:
+            session = self.sessions.get(session_id)
+            return self._copy(session) if session else None
+
+    def get_totals(self) -> Dict:
+        """Get lifetime totals and rolling-window totals for capacity planning"""
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            rolling = self._empty_totals()
+            for _, records, requests in self._recent:
+                for record in records:
+                    self._add(rolling, record)
+                rolling["requests"] += requests
+            rolling["window_seconds"] = self.rolling_window
+            return {
+                "totals": self._copy(self.totals),
+                "rolling": rolling,
+                "sessions": len(self.sessions),
+            }
+
+    def _add(self, bucket: Dict, record: Dict):
+        """Add a single usage record to an aggregate bucket"""
+        bucket["calls_count"] += 1
+        bucket["prompt_tokens"] += record.get("prompt_tokens", 0)
+        bucket["completion_tokens"] += record.get("completion_tokens", 0)
+        bucket["total_tokens"] += record.get("total_tokens", 0)
+        bucket["latency_ms"] = round(bucket["latency_ms"] + record.get("latency_ms", 0), 2)
+        bucket["cost_usd"] = round(bucket["cost_usd"] + self._cost(record), 6)
+        if record.get("hedge_loser"):
+            bucket["hedge_loser_tokens"] += record.get("total_tokens", 0)
+
+        agent = record.get("agent", "unknown")
+        per_agent = bucket["by_agent"].setdefault(agent, {
+            "calls_count": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_ms": 0.0,
+        })
+        per_agent["calls_count"] += 1
+        per_agent["prompt_tokens"] += record.get("prompt_tokens", 0)
+        per_agent["completion_tokens"] += record.get("completion_tokens", 0)
+        per_agent["latency_ms"] = round(per_agent["latency_ms"] + record.get("latency_ms", 0), 2)
+
+    def _cost(self, record: Dict) -> float:
+        """Estimate the cost of a call in USD from per-million-token prices"""
+        return (
+            record.get("prompt_tokens", 0) * self.input_cost_per_mtok
+            + record.get("completion_tokens", 0) * self.output_cost_per_mtok
+        ) / 1_000_000
+
+    def _prune(self, now: float):
+        """Drop records that fell out of the rolling window"""
+        while self._recent and now - self._recent[0][0] > self.rolling_window:
+            self._recent.popleft()
+
+    @staticmethod
+    def _copy(bucket: Dict) -> Dict:
+        copied = dict(bucket)
+        copied["by_agent"] = {agent: dict(stats) for agent, stats in bucket["by_agent"].items()}
+        return copied
+
+    @staticmethod
+    def _empty_totals() -> Dict:
+        return {
+            "requests": 0,
+            "calls_count": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "latency_ms": 0.0,
+            "cost_usd": 0.0,
+            "hedge_loser_tokens": 0,
+            "by_agent": {},
+        }
@@ -0,0 +1,941 @@
+"""
+App Factory - Builds the Pochita FastAPI application
+Both backend/main.py (uvicorn) and api/index.py (serverless) are thin
+wrappers around create_app
+"""
+
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from threading import Event, Lock
+from typing import Callable, ContextManager, Dict, Iterator, Mapping, Optional
+
+from anyio import from_thread
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from config import Settings
+from response_shaping import CompressionMiddleware, available_encodings, shape_result
+from schemas import BenchmarkRequest, GenerateRequest, ExecuteRequest, GenerateResponse
+from agents.request_context import RequestContext
+from agents.prompt_index import create_prompt_index
+from agents.response_cache import create_cache
+from agents.scheduler import FairScheduler
+from agents.session_store import create_session_store
+from agents.tracing import NULL_TRACE, create_tracer
+from agents.usage_tracker import UsageTracker
+
+logger = logging.getLogger("pochita")
+
+IMPORT_BUDGET_MS = float(os.getenv("POCHITA_IMPORT_BUDGET_MS", "1500"))
+
+JOB_POLL_INTERVAL = 0.25  # seconds
+JOB_LONG_POLL_MAX = 60  # seconds
+ARTIFACT_LIST_MAX = 500  # runs returned by one /artifacts query
+DISCONNECT_POLL_INTERVAL = 0.5  # seconds
+FINISHED = ("succeeded", "failed")
+
+
+def client_identity(request: Request) -> str:
+    """Scheduling identity of a caller: a hash of its API key, else its IP"""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+def request_lane(request: Request, priority: Optional[str], default: str = "interactive") -> str:
+    """Scheduling lane from the body field, then the X-Priority header"""
+    lane = priority or request.headers.get("x-priority", default).strip().lower()
+    return lane if lane in ("interactive", "bulk") else default
+
+
+def request_deadline(request: Request, deadline_ms: Optional[int]) -> Optional[float]:
+    """Absolute time.monotonic() deadline from the body field or X-Deadline-Ms header"""
+    if deadline_ms is None:
+        header = request.headers.get("x-deadline-ms")
+        deadline_ms = int(header) if header and header.isdigit() and int(header) > 0 else None
+    if deadline_ms is None:
+        return None
+    return time.monotonic() + deadline_ms / 1000
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request):
+    """Yield an Event that is set if the client disconnects before the block ends"""
+    cancel = Event()
+
+    async def watch():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+        cancel.set()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield cancel
+    finally:
+        watcher.cancel()
+
+
+class Components:
+    """
+    Services shared by the request handlers
+
+    Cheap components are built immediately. The LLM provider, agents and
+    executor pull in the Gemini SDK, so they are built on first use unless
+    an instance is injected.
+    """
+
+    def __init__(self, settings: Settings, provider=None, executor=None, session_store=None, cache=None):
+        self.settings = settings
+        self.sessions = session_store or create_session_store(settings.session_store, max_sessions=settings.max_sessions)
+        self.cache = cache or create_cache(settings.cache, max_entries=settings.cache_size, ttl=settings.cache_ttl)
+        self.prompt_index = create_prompt_index(
+            settings.prompt_index, max_entries=settings.prompt_index_size, threshold=settings.similarity_threshold
+        )
+        self.usage_tracker = UsageTracker(max_sessions=settings.max_sessions)
+        self.scheduler = FairScheduler(
+            {"llm": settings.llm_slots, "sandbox": settings.sandbox_slots},
+            per_client_limit=settings.per_client_slots,
+            weights=settings.client_weights,
+            bulk_share=settings.bulk_share,
+        ) if settings.scheduling else None
+        self.tracer = create_tracer(
+            settings.tracing,
+            sample_rate=settings.trace_sample_rate,
+            path=settings.trace_path,
+            max_bytes=settings.trace_max_bytes,
+            backups=settings.trace_backups,
+            endpoint=settings.otlp_endpoint,
+        )
+        self._provider = provider
+        self._executor = executor
+        self._pipeline = None
+        self._jobs = None
+        self._artifacts = None
+        self.hedger = None
+        self.router = None
+        self.replay = None
+        self.traffic = None
+        if settings.traffic_record_path:
+            from agents.replay import TrafficRecorder
+            self.traffic = TrafficRecorder(settings.traffic_record_path)
+        self._lock = Lock()
+        self.load_ms = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._pipeline is not None
+
+    @property
+    def pipeline(self):
+        """Get the agent pipeline, loading the agents once on first use"""
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    self._pipeline = self._build_pipeline()
+        return self._pipeline
+
+    @asynccontextmanager
+    async def session_turn(self, session_id: Optional[str]):
+        """Hold a session's lock; its requests share one conversation and artifacts, so they run one at a time"""
+        async with self.sessions.get(session_id or "default").lock:
+            yield
+
+    def job_turn(self, job: Dict):
+        """Session lock for a queued job"""
+        return self.session_turn(job["payload"].get("session_id"))
+
+    def _build_pipeline(self):
+        start = time.perf_counter()
+        from agents.llm_provider import create_provider
+        from agents.architect import ArchitectAgent
+        from agents.coder import CoderAgent
+        from agents.tester import TesterAgent
+        from agents.executor import create_executor
+        from agents.pipeline import Pipeline
+
+        provider_options = {}
+        if self.settings.provider == "replay":
+            provider_options = {"path": self.settings.llm_replay_path, "latency_scale": self.settings.replay_latency_scale}
+        provider = self._provider or create_provider(self.settings.provider, **provider_options)
+        if self.settings.llm_record_path:
+            # Innermost, so hedged and routed calls are recorded as the model saw them
+            from agents.replay import RecordingProvider
+            provider = RecordingProvider(provider, self.settings.llm_record_path)
+        self.replay = provider if self.settings.provider == "replay" and self._provider is None else None
+        if self.settings.hedging:
+            from agents.hedging import HedgedProvider
+            provider = self.hedger = HedgedProvider(
+                provider,
+                percentile=self.settings.hedge_percentile,
+                min_samples=self.settings.hedge_min_samples,
+                max_hedge_ratio=self.settings.hedge_max_ratio,
+                # Discarded calls are billed too, so they go into the usage totals
+                on_discarded=lambda request, usage: self.usage_tracker.record_calls(
+                    request.get("session_id") or "default", [usage]
+                ),
+            )
+        if self.settings.model_routing:
+            from agents.model_router import ModelRouter, RoutingProvider
+            self.router = ModelRouter(
+                tiers=self.settings.model_tiers,
+                long_input_chars=self.settings.route_long_input_chars,
+                large_code_chars=self.settings.route_large_code_chars,
+                failure_threshold=self.settings.circuit_failure_threshold,
+                cooldown=self.settings.circuit_cooldown,
+            )
+            provider = RoutingProvider(provider, self.router)
+        executor = self._executor or create_executor(self.settings.executor_backend, timeout=self.settings.executor_timeout)
+        pipeline = Pipeline(
+            architect=ArchitectAgent(provider),
+            coder=CoderAgent(provider),
+            tester=TesterAgent(provider),
+            executor=executor,
+            usage_tracker=self.usage_tracker,
+            cache=self.cache,
+            prompt_index=self.prompt_index,
+        )
+        self.load_ms = round((time.perf_counter() - start) * 1000, 2)
+        return pipeline
+
+    @property
+    def jobs(self):
+        """Get the durable job queue, opening the SQLite database on first use"""
+        if self._jobs is None:
+            with self._lock:
+                if self._jobs is None:
+                    from agents.job_queue import JobQueue
+                    self._jobs = JobQueue(self.settings.job_db_path, retention_seconds=self.settings.job_retention)
+        return self._jobs
+
+    @property
+    def artifacts(self):
+        """Get the artifact store, opening its index on first use; None when disabled"""
+        if self._artifacts is None and self.settings.artifacts != "none":
+            with self._lock:
+                if self._artifacts is None:
+                    from agents.artifact_store import create_artifact_store
+                    self._artifacts = create_artifact_store(
+                        self.settings.artifacts, root=self.settings.artifact_dir, max_bytes=self.settings.artifact_max_bytes
+                    )
+        return self._artifacts
+
+    def save_run(self, kind: str, payload: Dict, session, result: Dict):
+        """Persist a run's code, tests and result; a storage failure never fails the request"""
+        try:
+            store = self.artifacts
+            if store is None:
+                return
+            if kind == "generate":
+                conversation = result.get("conversation") or []
+                stored = {key: value for key, value in result.items() if key not in ("code", "tests", "conversation")}
+                stored["request"] = {
+                    key: payload.get(key) for key in ("prompt", "description", "profile", "mode", "architect")
+                }
+                stored["architect"] = next(
+                    (message["content"] for message in conversation if message.get("role") == "architect"), None
+                )
+                store.record(
+                    "generate", result.get("code", ""), result.get("tests", ""), stored,
+                    session_id=session.session_id, prompt=payload["prompt"]
+                )
+            else:
+                store.record(
+                    "execute", payload["code"], payload["tests"], result,
+                    session_id=session.session_id, prompt=session.current_prompt or None,
+                    passed=result.get("status") == "success"
+                )
+        except Exception:
+            logger.warning("Could not store %s artifacts", kind, exc_info=True)
+
+    def record_traffic(
+        self, endpoint: str, body: Dict, result: Dict, arrived_at: float, started: float, headers: Mapping[str, str]
+    ):
+        """Log a request and its scheduling headers for replay_traffic.py when traffic recording is on"""
+        if self.traffic is None:
+            return
+        try:
+            self.traffic.record(endpoint, body, result, arrived_at, (time.perf_counter() - started) * 1000, headers)
+        except Exception:
+            logger.warning("Could not record %s traffic", endpoint, exc_info=True)
+
+    def warm_caches(self) -> int:
+        """
+        Reload recent successful generations from the artifact store into the
+        prompt index and architect cache, so a restart does not start cold
+
+        Returns:
+            Number of generations loaded
+        """
+        store = self.artifacts
+        if store is None or self.settings.artifact_warm <= 0:
+            return 0
+        from agents.generation_profiles import cache_key, is_cacheable
+
+        warmed = 0
+        # Oldest first, so the newest runs end up most recently used
+        for row in reversed(store.find(kind="generate", limit=self.settings.artifact_warm)):
+            if row["status"] != "success":
+                continue
+            run = store.get(row["id"])
+            result = run["result"] or {}
+            request = result.get("request") or {}
+            if not request.get("prompt") or run["code"] is None:
+                continue
+            profile = request.get("profile") or "default"
+            analysis = result.get("architect")
+            if analysis and is_cacheable(profile) and not analysis.startswith("Error"):
+                self.cache.set(cache_key("architect", profile, request["prompt"]), analysis)
+            if request.get("mode", "full") != "tests_only":
+                text = f"{request['prompt']}\n{request['description']}" if request.get("description") else request["prompt"]
+                self.prompt_index.add_generation(text, profile, request["prompt"], analysis, run["code"], run["tests"] or "")
+            warmed += 1
+        return warmed
+
+    @asynccontextmanager
+    async def slot(self, resource: str, client: str, lane: str, on_queued: Optional[Callable] = None):
+        """Hold a scheduler slot; yields the ticket, or None when scheduling is off"""
+        if self.scheduler is None:
+            yield None
+            return
+        async with self.scheduler.slot(resource, client, lane, on_queued) as ticket:
+            yield ticket
+
+    def thread_slot(self, resource: str, client: str, lane: str) -> Callable[[], ContextManager]:
+        """
+        Scheduler slot for pipeline code in a worker thread, e.g. the tester
+        calls of a request that holds a sandbox slot. The scheduler lives on
+        the event loop, so the slot is taken and given back there.
+        """
+        if self.scheduler is None:
+            return nullcontext
+
+        @contextmanager
+        def hold():
+            manager = self.slot(resource, client, lane)
+            from_thread.run(manager.__aenter__)
+            try:
+                yield
+            finally:
+                from_thread.run(manager.__aexit__, None, None, None)
+
+        return hold
+
+    @asynccontextmanager
+    async def job_slot(self, job: Dict):
+        """Session lock, then scheduler slot, for a queued job; jobs run in the bulk lane by default"""
+        payload = job["payload"]
+        resource = "llm" if job["kind"] == "generate" else "sandbox"
+        async with self.job_turn(job):
+            async with self.slot(resource, payload.get("client_id") or "jobs", payload.get("priority") or "bulk") as ticket:
+                yield ticket
+
+    def run_generate(self, payload: Dict, deadline: Optional[float] = None, cancel: Optional[Event] = None) -> Dict:
+        """Run /generate for a GenerateRequest payload"""
+        session_id = payload.get("session_id") or "default"
+        session = self.sessions.get(session_id)
+        try:
+            pipeline = self.pipeline
+        except Exception as e:
+            return {
+                "status": "error",
+                "code": f"# Error: {str(e)}",
+                "tests": f"# Error: {str(e)}",
+                "conversation": []
+            }
+        trace = self.start_trace(
+            "generate",
+            session_id=session_id,
+            prompt_chars=len(payload["prompt"]),
+            mode=payload.get("mode", "full"),
+            profile=payload.get("profile", "default"),
+        )
+        context = RequestContext(
+            session_id=session_id, profile=payload.get("profile", "default"), deadline=deadline, cancel=cancel, trace=trace
+        )
+        result = pipeline.generate(
+            payload["prompt"],
+            payload.get("description") or "",
+            session,
+            context,
+            mode=payload.get("mode", "full"),
+            architect=payload.get("architect", True),
+            code=payload.get("code"),
+            reuse=payload.get("reuse") or self.settings.similarity_reuse,
+        )
+        self.save_run("generate", payload, session, result)
+        return self.finish_trace(trace, result)
+
+    def run_execute(
+        self,
+        payload: Dict,
+        deadline: Optional[float] = None,
+        cancel: Optional[Event] = None,
+        client: str = "jobs",
+        lane: str = "bulk",
+    ) -> Dict:
+        """Run /execute for an ExecuteRequest payload; client and lane schedule its tester calls"""
+        session_id = payload.get("session_id") or "default"
+        session = self.sessions.get(session_id)
+        try:
+            pipeline = self.pipeline
+        except Exception as e:
+            return {
+                "status": "error",
+                "execution_status": "error",
+                "output": "",
+                "error": str(e),
+                "test_summary": "Error during execution",
+                "total_tests": 0,
+                "passed_tests": 0,
+                "failed_tests": 0,
+                "test_details": [],
+                "raw_output": str(e)
+            }
+        trace = self.start_trace(
+            "execute", session_id=session_id, code_chars=len(payload["code"]), tests_chars=len(payload["tests"])
+        )
+        context = RequestContext(
+            session_id=session_id, profile=session.current_profile, deadline=deadline, cancel=cancel, trace=trace,
+            llm_slot=self.thread_slot("llm", client, lane),
+        )
+        result = pipeline.execute(
+            payload["code"], payload["tests"], session, context,
+            profiling=payload.get("profiling", False),
+            minimize=payload.get("minimize", False),
+            selection=payload.get("test_selection", "all"),
+        )
+        self.save_run("execute", payload, session, result)
+        return self.finish_trace(trace, result)
+
+    def stream_execute(
+        self,
+        payload: Dict,
+        deadline: Optional[float] = None,
+        cancel: Optional[Event] = None,
+        client: str = "jobs",
+        lane: str = "bulk",
+    ) -> Iterator[Dict]:
+        """Run /execute for an ExecuteRequest payload, yielding progress events"""
+        session_id = payload.get("session_id") or "default"
+        session = self.sessions.get(session_id)
+        try:
+            pipeline = self.pipeline
+        except Exception:
+            # run_execute reports the load failure in the usual error shape
+            yield {"event": "result", "result": self.run_execute(payload, deadline, cancel, client, lane)}
+            return
+        trace = self.start_trace(
+            "execute", session_id=session_id, code_chars=len(payload["code"]), tests_chars=len(payload["tests"]), stream=True
+        )
+        context = RequestContext(
+            session_id=session_id, profile=session.current_profile, deadline=deadline, cancel=cancel, trace=trace,
+            llm_slot=self.thread_slot("llm", client, lane),
+        )
+        try:
+            events = pipeline.execute_stream(
+                payload["code"], payload["tests"], session, context,
+                profiling=payload.get("profiling", False),
+                minimize=payload.get("minimize", False),
+                selection=payload.get("test_selection", "all"),
+            )
+            for event in events:
+                if event["event"] == "result":
+                    self.save_run("execute", payload, session, event["result"])
+                    self.finish_trace(trace, event["result"])
+                yield event
+        finally:
+            # Client went away before the result event
+            trace.finish(status="abandoned")
+
+    def run_benchmark(
+        self,
+        payload: Dict,
+        deadline: Optional[float] = None,
+        cancel: Optional[Event] = None,
+        client: str = "jobs",
+        lane: str = "bulk",
+    ) -> Dict:
+        """Run /benchmark for a BenchmarkRequest payload; client and lane schedule its tester call"""
+        session_id = payload.get("session_id") or "default"
+        session = self.sessions.get(session_id)
+        code = payload.get("code") or session.current_code
+        if not code:
+            return {"status": "error", "error": "No code to benchmark in this session"}
+        try:
+            pipeline = self.pipeline
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+        trace = self.start_trace("benchmark", session_id=session_id, code_chars=len(code))
+        context = RequestContext(
+            session_id=session_id, profile=session.current_profile, deadline=deadline, cancel=cancel, trace=trace,
+            llm_slot=self.thread_slot("llm", client, lane),
+        )
+        result = pipeline.benchmark(code, session, context, benchmarks=payload.get("benchmarks"))
+        return self.finish_trace(trace, result)
+
+    def start_trace(self, name: str, **attributes):
+        """Start a request trace, or NULL_TRACE when tracing is off or not sampled"""
+        if self.tracer is None:
+            return NULL_TRACE
+        return self.tracer.start(name, **attributes)
+
+    @staticmethod
+    def finish_trace(trace, result: Dict) -> Dict:
+        """Export a request's trace and report its id in the result"""
+        trace.finish(status=result["status"], deadline_exceeded=result.get("deadline_exceeded", False))
+        if trace.sampled:
+            result["trace_id"] = trace.trace_id
+        return result
+
+    def run_job(self, kind: str, payload: Dict) -> Dict:
+        """Job handler used by the queue workers; a job's deadline_ms counts from when it starts"""
+        deadline = time.monotonic() + payload["deadline_ms"] / 1000 if payload.get("deadline_ms") else None
+        if kind == "generate":
+            return self.run_generate(payload, deadline)
+        if kind == "execute":
+            return self.run_execute(payload, deadline, client=payload.get("client_id") or "jobs", lane=payload.get("priority") or "bulk")
+        raise ValueError(f"Unknown job kind: {kind}")
+
+
+def create_app(settings: Optional[Settings] = None, **components) -> FastAPI:
+    """
+    Build the FastAPI application
+
+    Args:
+        settings: Deployment settings; read from the environment if omitted
+        **components: Optional instances overriding the configured provider,
+            executor, session_store or cache
+
+    Returns:
+        Configured FastAPI app
+    """
+    settings = settings or Settings.from_env()
+    services = Components(settings, **components)
+
+    app = FastAPI(
+        title="Pochita API",
+        description="AI agents for code generation and testing",
+        version="0.1.0"
+    )
+    app.state.settings = settings
+    app.state.components = services
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    encodings = available_encodings(settings.compression)
+    if encodings:
+        app.add_middleware(CompressionMiddleware, encodings=encodings, minimum_size=settings.compression_min_bytes)
+
+    worker_pool = None
+    if settings.job_workers > 0:
+        from agents.job_queue import JobWorkerPool
+        worker_pool = JobWorkerPool(
+            services.jobs, services.run_job, workers=settings.job_workers, gate=services.job_slot
+        )
+
+    @app.on_event("startup")
+    async def preload_agents():
+        """Warm the agents and caches and start job workers for long-lived deployments"""
+        if settings.preload_agents:
+            await run_in_threadpool(lambda: services.pipeline)
+        if settings.artifact_warm > 0:
+            await run_in_threadpool(services.warm_caches)
+        if worker_pool is not None:
+            worker_pool.start()
+
+    @app.on_event("shutdown")
+    async def stop_workers():
+        """Stop job workers; unfinished jobs are requeued when their lease expires"""
+        if worker_pool is not None:
+            await worker_pool.stop()
+
+    # Root Endpoint
+    @app.get("/")
+    async def root():
+        """Root endpoint"""
+        return {
+            "status": "ok",
+            "message": "Pochita API"
+        }
+
+    # Health Check Endpoint
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint to verify API is running"""
+        return {
+            "status": "healthy",
+            "message": "Pochita API is running",
+            "gemini_configured": bool(os.getenv("GEMINI_API_KEY")),
+            "deployment": settings.deployment,
+            "cache": services.cache.stats(),
+            "prompt_index": services.prompt_index.stats(),
+            "startup": {
+                "import_ms": IMPORT_MS,
+                "import_budget_ms": IMPORT_BUDGET_MS,
+                "agents_loaded": services.loaded,
+                "agents_load_ms": services.load_ms
+            }
+        }
+
+    # Usage Endpoints
+    @app.get("/usage")
+    async def usage_totals():
+        """Rolling token usage, latency and cost totals across all sessions"""
+        return services.usage_tracker.get_totals()
+
+    @app.get("/usage/{session_id}")
+    async def session_usage(session_id: str):
+        """Token usage, latency and cost for a single session"""
+        session = services.usage_tracker.get_session(session_id)
+        if session is None:
+            return {"status": "not_found", "session_id": session_id}
+        return {"status": "ok", "session_id": session_id, "usage": session}
+
+    @app.get("/hedging/stats")
+    async def hedging_stats():
+        """Hedge rate and win statistics of the agent call path"""
+        if services.hedger is None:
+            return {"enabled": False}
+        return {"enabled": True, **services.hedger.stats()}
+
+    @app.get("/replay/stats")
+    async def replay_stats():
+        """Agent calls answered from the replay recording, by exact and nearest match"""
+        if services.replay is None:
+            return {"enabled": False}
+        return {"enabled": True, **services.replay.stats()}
+
+    @app.get("/routing/stats")
+    async def routing_stats():
+        """Calls per model tier, fallbacks and circuit breaker state"""
+        if services.router is None:
+            return {"enabled": False}
+        return {"enabled": True, **services.router.stats()}
+
+    @app.get("/scheduler/stats")
+    async def scheduler_stats():
+        """Slot usage, queue depth per lane and active clients per resource"""
+        if services.scheduler is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            "per_client_slots": settings.per_client_slots,
+            "bulk_share": settings.bulk_share,
+            "resources": services.scheduler.stats(),
+        }
+
+    # Admin Endpoints
+    profile_lock = asyncio.Lock()
+
+    def require_admin_token(http: Request):
+        from agents.live_profiler import check_admin_token
+
+        if not check_admin_token(settings.admin_token, http.headers.get("x-admin-token")):
+            raise HTTPException(status_code=403, detail="Admin token required")
+
+    @app.post("/admin/profile")
+    async def admin_profile(
+        http: Request, seconds: float = 5, interval_ms: float = 5, memory: bool = True, idle: bool = False
+    ):
+        """
+        Profile the live server for a few seconds: sampled thread and task
+        stacks (collapsed and pstats-like) and a tracemalloc growth diff.
+        Threads parked in a blocking wait are skipped unless ?idle=true.
+        Requires the X-Admin-Token header to match POCHITA_ADMIN_TOKEN.
+        """
+        from agents.live_profiler import SamplingProfiler
+
+        require_admin_token(http)
+        if profile_lock.locked():
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        async with profile_lock:
+            profiler = SamplingProfiler(interval=min(max(interval_ms, 1), 100) / 1000)
+            return await profiler.run(min(max(seconds, 0.1), settings.profile_max_seconds), memory=memory, idle=idle)
+
+    # Generate Endpoint
+    @app.post("/generate", response_model=GenerateResponse)
+    async def generate(request: GenerateRequest, http: Request):
+        """Generate code and tests using AI agents"""
+        arrived_at, started = time.time(), time.perf_counter()
+        lane = request_lane(http, request.priority)
+        deadline = request_deadline(http, request.deadline_ms)
+        async with services.session_turn(request.session_id):
+            async with cancel_on_disconnect(http) as cancel, services.slot("llm", client_identity(http), lane) as ticket:
+                result = await run_in_threadpool(services.run_generate, request.model_dump(), deadline, cancel)
+        if ticket is not None:
+            result["scheduling"] = ticket.to_dict()
+        services.record_traffic("/generate", request.model_dump(), result, arrived_at, started, http.headers)
+        response = GenerateResponse(**result)
+        if request.fields:
+            # The shaped payload no longer matches GenerateResponse, so skip its validation
+            return JSONResponse(shape_result(response.model_dump(), request.fields))
+        return response
+
+    # Execute Endpoint
+    @app.post("/execute")
+    async def execute(request: ExecuteRequest, http: Request) -> dict:
+        """Execute code and tests with feedback loop"""
+        arrived_at, started = time.time(), time.perf_counter()
+        lane = request_lane(http, request.priority)
+        deadline = request_deadline(http, request.deadline_ms)
+        async with services.session_turn(request.session_id):
+            async with cancel_on_disconnect(http) as cancel, services.slot("sandbox", client_identity(http), lane) as ticket:
+                result = await run_in_threadpool(
+                    services.run_execute, request.model_dump(), deadline, cancel, client_identity(http), lane
+                )
+        if ticket is not None:
+            result["scheduling"] = ticket.to_dict()
+        services.record_traffic("/execute", request.model_dump(), result, arrived_at, started, http.headers)
+        return shape_result(result, request.fields, request.max_log_chars or settings.max_log_chars)
+
+    # Benchmark Endpoints
+    @app.post("/benchmark")
+    async def benchmark(request: BenchmarkRequest, http: Request) -> dict:
+        """Time code at increasing input sizes, fit its complexity and compare with the last run"""
+        lane = request_lane(http, request.priority)
+        deadline = request_deadline(http, request.deadline_ms)
+        async with services.session_turn(request.session_id):
+            async with cancel_on_disconnect(http) as cancel, services.slot("sandbox", client_identity(http), lane) as ticket:
+                result = await run_in_threadpool(
+                    services.run_benchmark, request.model_dump(), deadline, cancel, client_identity(http), lane
+                )
+        if ticket is not None:
+            result["scheduling"] = ticket.to_dict()
+        return result
+
+    @app.get("/benchmark/{session_id}")
+    async def benchmark_history(session_id: str):
+        """Benchmark runs kept for a session, oldest first"""
+        session = services.sessions.get(session_id)
+        return {"session_id": session_id, "benchmarks": session.current_benchmarks, "runs": session.benchmark_runs}
+
+    @app.get("/conversation/{session_id}")
+    async def conversation_history(session_id: str, since: int = 0):
+        """
+        Conversation messages of a session from index `since` on. Each
+        /generate starts a new conversation, so a client holding its N
+        messages gets only the later refinement messages with since=N.
+        """
+        history = services.sessions.get(session_id).conversation.get_history()
+        since = max(since, 0)
+        return {
+            "session_id": session_id,
+            "conversation": history[since:],
+            "conversation_offset": min(since, len(history)),
+            "conversation_total": len(history),
+        }
+
+    # Artifact Endpoints
+    @app.get("/artifacts")
+    async def list_artifacts(
+        http: Request,
+        prompt: Optional[str] = None,
+        session_id: Optional[str] = None,
+        kind: Optional[str] = None,
+        passed: Optional[bool] = None,
+        since: Optional[float] = None,
+        limit: int = 50,
+    ):
+        """Stored generate/execute runs matching the filters, newest first; requires X-Admin-Token"""
+        require_admin_token(http)
+        store = services.artifacts
+        if store is None:
+            return {"status": "error", "error": "Artifact store is disabled"}
+        runs = await run_in_threadpool(
+            store.find, prompt=prompt, session_id=session_id, kind=kind, passed=passed, since=since,
+            limit=min(max(limit, 1), ARTIFACT_LIST_MAX)
+        )
+        return {"runs": runs}
+
+    @app.get("/artifacts/stats")
+    async def artifact_stats():
+        """Runs, deduplicated objects and bytes in the artifact store"""
+        store = services.artifacts
+        if store is None:
+            return {"status": "error", "error": "Artifact store is disabled"}
+        return await run_in_threadpool(store.stats)
+
+    @app.get("/artifacts/objects/{digest}")
+    async def artifact_object(digest: str, http: Request):
+        """A stored code, tests or result text by content hash; requires X-Admin-Token"""
+        require_admin_token(http)
+        store = services.artifacts
+        content = await run_in_threadpool(store.get_object, digest) if store is not None else None
+        if content is None:
+            return {"status": "not_found", "hash": digest}
+        return {"hash": digest, "content": content}
+
+    @app.get("/artifacts/{run_id}")
+    async def artifact_run(run_id: int, http: Request):
+        """A stored run with its code, tests and result; requires X-Admin-Token"""
+        require_admin_token(http)
+        store = services.artifacts
+        run = await run_in_threadpool(store.get, run_id) if store is not None else None
+        if run is None:
+            return {"status": "not_found", "run_id": run_id}
+        return run
+
+    @app.post("/execute/stream")
+    async def execute_stream(request: ExecuteRequest, http: Request):
+        """
+        Execute code and tests, streaming per-test outcomes as Server-Sent Events.
+        A "queued" event reports the queue position and estimated wait when the
+        request has to wait for a sandbox slot, and a "scheduled" event the
+        actual wait once the slot is held; the final "result" event carries
+        the same payload as /execute.
+        """
+        arrived_at, started = time.time(), time.perf_counter()
+        lane = request_lane(http, request.priority)
+        client = client_identity(http)
+        deadline = request_deadline(http, request.deadline_ms)
+
+        # Set once the response ends, including when the client disconnects
+        cancel = Event()
+        events = asyncio.Queue()
+
+        def report_queued(ticket):
+            events.put_nowait({"event": "queued", **ticket.to_dict()})
+
+        async def run():
+            # Runs as its own task, so the session and slot are given back when
+            # the run stops rather than when an abandoned response is collected
+            try:
+                async with services.session_turn(request.session_id):
+                    async with services.slot("sandbox", client, lane, report_queued) as ticket:
+                        if cancel.is_set():
+                            return
+                        if ticket is not None:
+                            events.put_nowait({"event": "scheduled", **ticket.to_dict()})
+                        stream = services.stream_execute(request.model_dump(), deadline, cancel, client, lane)
+                        async for event in iterate_in_threadpool(stream):
+                            if event["event"] == "result":
+                                services.record_traffic(
+                                    "/execute/stream", request.model_dump(), event["result"], arrived_at, started,
+                                    http.headers,
+                                )
+                            events.put_nowait(event)
+            except Exception:
+                logger.exception("Streamed execution failed")
+            finally:
+                events.put_nowait(None)
+
+        async def stream_events():
+            runner = asyncio.create_task(run())
+            try:
+                while (event := await events.get()) is not None:
+                    if event["event"] == "result":
+                        event = {**event, "result": shape_result(
+                            event["result"], request.fields, request.max_log_chars or settings.max_log_chars
+                        )}
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            finally:
+                cancel.set()
+            await runner
+
+        return StreamingResponse(
+            stream_events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # Runs after a disconnect too, while the generator may still be parked at a yield
+            background=BackgroundTask(cancel.set),
+        )
+
+    # Job Endpoints
+    @app.post("/jobs/generate")
+    async def submit_generate_job(request: GenerateRequest, http: Request):
+        """Queue a /generate job and return its id immediately"""
+        return await submit_job("generate", request, http)
+
+    @app.post("/jobs/execute")
+    async def submit_execute_job(request: ExecuteRequest, http: Request):
+        """Queue an /execute job and return its id immediately"""
+        return await submit_job("execute", request, http)
+
+    @app.get("/jobs/stats")
+    async def job_stats():
+        """Queue depth, wait-time and run-time statistics"""
+        stats = await run_in_threadpool(services.jobs.stats)
+        stats["workers"] = settings.job_workers
+        return stats
+
+    @app.get("/jobs/{job_id}")
+    async def job_status(job_id: str, wait: float = 0):
+        """
+        Get job status; with ?wait=N, long-poll up to N seconds (max 60)
+        until the job finishes
+        """
+        deadline = time.monotonic() + min(max(wait, 0), JOB_LONG_POLL_MAX)
+        while True:
+            job = await run_in_threadpool(services.jobs.get, job_id)
+            if job is None:
+                return {"status": "not_found", "job_id": job_id}
+            if job["status"] in FINISHED or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+        return await describe_job(job)
+
+    @app.get("/jobs/{job_id}/result")
+    async def job_result(job_id: str):
+        """Get the result of a finished job"""
+        job = await run_in_threadpool(services.jobs.get, job_id)
+        if job is None:
+            return {"status": "not_found", "job_id": job_id}
+        if job["status"] == "succeeded":
+            return job["result"]
+        return await describe_job(job)
+
+    async def submit_job(kind: str, request, http: Request) -> Dict:
+        payload = request.model_dump()
+        payload["client_id"] = client_identity(http)
+        payload["priority"] = request_lane(http, request.priority, default="bulk")
+        job_id = await run_in_threadpool(services.jobs.submit, kind, payload)
+        if worker_pool is not None:
+            worker_pool.notify()
+        return {
+            "job_id": job_id,
+            "status": "queued",
+            "queue_position": await run_in_threadpool(services.jobs.position, job_id)
+        }
+
+    async def describe_job(job: Dict) -> Dict:
+        description = {
+            "job_id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "attempts": job["attempts"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "error": job["error"],
+        }
+        if job["status"] == "queued":
+            description["queue_position"] = await run_in_threadpool(services.jobs.position, job["id"])
+        if job["status"] == "succeeded":
+            description["result"] = job["result"]
+        return description
+
+    return app
+
+
+IMPORT_MS = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 2)
+if IMPORT_MS > IMPORT_BUDGET_MS:
+    logger.warning("Module import took %.0fms, over the %.0fms budget", IMPORT_MS, IMPORT_BUDGET_MS)
@@ -0,0 +1,248 @@
+"""
+Config - Deployment settings for the Pochita app factory
+Performance knobs are read from the environment so serverless and
+long-lived uvicorn deployments can be tuned without forking code
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_list(name: str) -> Optional[List[str]]:
+    value = os.getenv(name)
+    return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+
+def _env_weights(name: str) -> Dict[str, float]:
+    """Parse "client=weight,client=weight" into a dict"""
+    weights = {}
+    for item in _env_list(name) or []:
+        client, _, weight = item.rpartition("=")
+        if client:
+            weights[client] = float(weight)
+    return weights
+
+
+class Settings:
+    """Components and tuning knobs used by create_app"""
+
+    DEPLOYMENTS = ("server", "serverless")
+
+    def __init__(
+        self,
+        deployment: str = "server",
+        provider: str = "gemini",
+        executor_backend: str = "subprocess",
+        executor_timeout: int = 10,
+        session_store: str = "memory",
+        max_sessions: int = 1000,
+        cache: str = "memory",
+        cache_size: int = 256,
+        cache_ttl: int = 3600,
+        prompt_index: str = "memory",
+        prompt_index_size: int = 1000,
+        similarity_threshold: float = 0.8,
+        similarity_reuse: str = "off",
+        artifacts: str = "sqlite",
+        artifact_dir: Optional[str] = None,
+        artifact_max_bytes: int = 256 * 1024 * 1024,
+        artifact_warm: int = 500,
+        preload_agents: bool = True,
+        job_workers: int = 2,
+        job_db_path: Optional[str] = None,
+        job_retention: int = 24 * 3600,
+        hedging: bool = False,
+        hedge_percentile: float = 95,
+        hedge_min_samples: int = 20,
+        hedge_max_ratio: float = 0.1,
+        model_routing: bool = False,
+        model_tiers: Optional[List[str]] = None,
+        route_long_input_chars: int = 600,
+        route_large_code_chars: int = 4000,
+        circuit_failure_threshold: int = 3,
+        circuit_cooldown: float = 60,
+        scheduling: bool = True,
+        llm_slots: int = 8,
+        sandbox_slots: int = 4,
+        per_client_slots: int = 2,
+        bulk_share: int = 5,
+        client_weights: Optional[Dict[str, float]] = None,
+        tracing: str = "none",
+        trace_sample_rate: float = 1.0,
+        trace_path: Optional[str] = None,
+        trace_max_bytes: int = 10 * 1024 * 1024,
+        trace_backups: int = 3,
+        otlp_endpoint: str = "http://localhost:4318",
+        admin_token: Optional[str] = None,
+        profile_max_seconds: float = 60,
+        llm_record_path: Optional[str] = None,
+        llm_replay_path: Optional[str] = None,
+        replay_latency_scale: float = 1.0,
+        traffic_record_path: Optional[str] = None,
+        compression: str = "auto",
+        compression_min_bytes: int = 1024,
+        max_log_chars: int = 0,
+    ):
+        if deployment not in self.DEPLOYMENTS:
+            raise ValueError(f"Unknown deployment: {deployment}")
+        self.deployment = deployment
+        self.provider = provider
+        self.executor_backend = executor_backend
+        self.executor_timeout = executor_timeout
+        self.session_store = session_store
+        self.max_sessions = max_sessions
+        self.cache = cache
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.prompt_index = prompt_index
+        self.prompt_index_size = prompt_index_size
+        self.similarity_threshold = similarity_threshold
+        self.similarity_reuse = similarity_reuse
+        self.artifacts = artifacts
+        self.artifact_dir = artifact_dir or str(Path(__file__).parent / "generated_code" / "artifacts")
+        self.artifact_max_bytes = artifact_max_bytes
+        self.artifact_warm = artifact_warm
+        self.preload_agents = preload_agents
+        self.job_workers = job_workers
+        self.job_db_path = job_db_path or str(Path(__file__).parent / "generated_code" / "jobs.sqlite")
+        self.job_retention = job_retention
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_ratio = hedge_max_ratio
+        self.model_routing = model_routing
+        self.model_tiers = model_tiers
+        self.route_long_input_chars = route_long_input_chars
+        self.route_large_code_chars = route_large_code_chars
+        self.circuit_failure_threshold = circuit_failure_threshold
+        self.circuit_cooldown = circuit_cooldown
+        self.scheduling = scheduling
+        self.llm_slots = llm_slots
+        self.sandbox_slots = sandbox_slots
+        self.per_client_slots = per_client_slots
+        self.bulk_share = bulk_share
+        self.client_weights = client_weights or {}
+        self.tracing = tracing
+        self.trace_sample_rate = trace_sample_rate
+        self.trace_path = trace_path or str(Path(__file__).parent / "generated_code" / "traces.jsonl")
+        self.trace_max_bytes = trace_max_bytes
+        self.trace_backups = trace_backups
+        self.otlp_endpoint = otlp_endpoint
+        self.admin_token = admin_token
+        self.profile_max_seconds = profile_max_seconds
+        self.llm_record_path = llm_record_path
+        self.llm_replay_path = llm_replay_path
+        self.replay_latency_scale = replay_latency_scale
+        self.traffic_record_path = traffic_record_path
+        self.compression = compression
+        self.compression_min_bytes = compression_min_bytes
+        self.max_log_chars = max_log_chars
+
+    @classmethod
+    def from_env(cls, deployment: Optional[str] = None) -> "Settings":
+        """
+        Build settings from environment variables
+
+        Args:
+            deployment: "server" (long-lived uvicorn) or "serverless"; defaults
+                to POCHITA_DEPLOYMENT, then "server"
+
+        Returns:
+            Settings with deployment-specific defaults overridden by env vars
+        """
+        load_dotenv()
+        deployment = os.getenv("POCHITA_DEPLOYMENT", deployment or "server")
+        serverless = deployment == "serverless"
+
+        return cls(
+            deployment=deployment,
+            provider=os.getenv("POCHITA_PROVIDER", "gemini"),
+            executor_backend=os.getenv("POCHITA_EXECUTOR", "subprocess"),
+            executor_timeout=_env_int("POCHITA_EXECUTOR_TIMEOUT", 10),
+            session_store=os.getenv("POCHITA_SESSION_STORE", "memory"),
+            max_sessions=_env_int("POCHITA_MAX_SESSIONS", 100 if serverless else 1000),
+            cache=os.getenv("POCHITA_CACHE", "memory"),
+            cache_size=_env_int("POCHITA_CACHE_SIZE", 64 if serverless else 256),
+            cache_ttl=_env_int("POCHITA_CACHE_TTL", 3600),
+            prompt_index=os.getenv("POCHITA_PROMPT_INDEX", "memory"),
+            prompt_index_size=_env_int("POCHITA_PROMPT_INDEX_SIZE", 200 if serverless else 1000),
+            similarity_threshold=_env_float("POCHITA_SIMILARITY_THRESHOLD", 0.8),
+            similarity_reuse=os.getenv("POCHITA_SIMILARITY_REUSE", "off"),
+            artifacts=os.getenv("POCHITA_ARTIFACTS", "sqlite"),
+            artifact_dir=os.getenv(
+                "POCHITA_ARTIFACT_DIR",
+                os.path.join(tempfile.gettempdir(), "pochita_artifacts") if serverless else None
+            ),
+            artifact_max_bytes=_env_int("POCHITA_ARTIFACT_MAX_BYTES", (32 if serverless else 256) * 1024 * 1024),
+            # Cold starts should not pay for reading old runs back
+            artifact_warm=_env_int("POCHITA_ARTIFACT_WARM", 0 if serverless else 500),
+            preload_agents=_env_bool("POCHITA_PRELOAD_AGENTS", not serverless),
+            # Serverless functions are frozen between requests, so background
+            # workers only run in long-lived deployments (or job_worker.py)
+            job_workers=_env_int("POCHITA_JOB_WORKERS", 0 if serverless else 2),
+            job_db_path=os.getenv(
+                "POCHITA_JOB_DB",
+                os.path.join(tempfile.gettempdir(), "pochita_jobs.sqlite") if serverless else None
+            ),
+            job_retention=_env_int("POCHITA_JOB_RETENTION", 24 * 3600),
+            hedging=_env_bool("POCHITA_HEDGING", False),
+            hedge_percentile=_env_float("POCHITA_HEDGE_PERCENTILE", 95),
+            hedge_min_samples=_env_int("POCHITA_HEDGE_MIN_SAMPLES", 20),
+            hedge_max_ratio=_env_float("POCHITA_HEDGE_MAX_RATIO", 0.1),
+            model_routing=_env_bool("POCHITA_MODEL_ROUTING", False),
+            model_tiers=_env_list("POCHITA_MODEL_TIERS"),
+            route_long_input_chars=_env_int("POCHITA_ROUTE_LONG_INPUT_CHARS", 600),
+            route_large_code_chars=_env_int("POCHITA_ROUTE_LARGE_CODE_CHARS", 4000),
+            circuit_failure_threshold=_env_int("POCHITA_CIRCUIT_FAILURES", 3),
+            circuit_cooldown=_env_float("POCHITA_CIRCUIT_COOLDOWN", 60),
+            scheduling=_env_bool("POCHITA_SCHEDULING", True),
+            llm_slots=_env_int("POCHITA_LLM_SLOTS", 8),
+            sandbox_slots=_env_int("POCHITA_SANDBOX_SLOTS", 2 if serverless else 4),
+            per_client_slots=_env_int("POCHITA_PER_CLIENT_SLOTS", 2),
+            bulk_share=_env_int("POCHITA_BULK_SHARE", 5),
+            client_weights=_env_weights("POCHITA_CLIENT_WEIGHTS"),
+            tracing=os.getenv("POCHITA_TRACING", "none"),
+            trace_sample_rate=_env_float("POCHITA_TRACE_SAMPLE_RATE", 1.0),
+            trace_path=os.getenv(
+                "POCHITA_TRACE_PATH",
+                os.path.join(tempfile.gettempdir(), "pochita_traces.jsonl") if serverless else None
+            ),
+            trace_max_bytes=_env_int("POCHITA_TRACE_MAX_BYTES", 10 * 1024 * 1024),
+            trace_backups=_env_int("POCHITA_TRACE_BACKUPS", 3),
+            otlp_endpoint=os.getenv("POCHITA_OTLP_ENDPOINT", "http://localhost:4318"),
+            admin_token=os.getenv("POCHITA_ADMIN_TOKEN"),
+            profile_max_seconds=_env_float("POCHITA_PROFILE_MAX_SECONDS", 60),
+            llm_record_path=os.getenv("POCHITA_LLM_RECORD"),
+            llm_replay_path=os.getenv("POCHITA_LLM_REPLAY"),
+            replay_latency_scale=_env_float("POCHITA_REPLAY_LATENCY_SCALE", 1.0),
+            traffic_record_path=os.getenv("POCHITA_TRAFFIC_RECORD"),
+            compression=os.getenv("POCHITA_COMPRESSION", "auto"),
+            compression_min_bytes=_env_int("POCHITA_COMPRESSION_MIN_BYTES", 1024),
+            max_log_chars=_env_int("POCHITA_MAX_LOG_CHARS", 0),
+        )
+
+    def to_dict(self) -> dict:
+        settings = dict(vars(self))
+        settings["admin_token"] = "***" if self.admin_token else None
+        return settings
@@ -0,0 +1,33 @@
+"""
+Pochita Job Worker - Drains the job queue in a separate process
+Run alongside the API (or several copies of it) to add workers:
+
+    python job_worker.py --workers 4
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app_factory import Components
+from config import Settings
+from agents.job_queue import JobWorkerPool
+
+
+async def run(workers: int):
+    services = Components(Settings.from_env())
+    pool = JobWorkerPool(services.jobs, services.run_job, workers=workers, gate=services.job_turn)
+    pool.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drain the Pochita job queue")
+    parser.add_argument("--workers", type=int, default=2, help="concurrent worker tasks")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.workers))
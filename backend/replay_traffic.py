@@ -0,0 +1,139 @@
+"""
+Pochita Traffic Replay - Replays recorded /generate and /execute traffic
+Sends the requests logged with POCHITA_TRAFFIC_RECORD to a running build and
+compares its throughput and latency with the recording. Start the target
+with POCHITA_PROVIDER=replay and POCHITA_LLM_REPLAY so agent calls are
+answered from the recorded model outputs:
+
+    python replay_traffic.py traffic.jsonl --url http://localhost:8000 --speed 1
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+
+def load_traffic(path: str, endpoints: Optional[List[str]] = None) -> List[Dict]:
+    """Recorded requests in arrival order, optionally limited to some endpoints"""
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if endpoints:
+        entries = [entry for entry in entries if entry["endpoint"] in endpoints]
+    return sorted(entries, key=lambda entry: entry["at"])
+
+
+def send(url: str, entry: Dict, timeout: float) -> Dict:
+    """Send one recorded request with its recorded headers and time it until the full body has arrived"""
+    request = urllib.request.Request(
+        url + entry["endpoint"],
+        data=json.dumps(entry["body"]).encode(),
+        headers={"Content-Type": "application/json", **entry.get("headers", {})},
+        method="POST",
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+            code = response.status
+    except urllib.error.HTTPError as e:
+        body, code = e.read(), e.code
+    except Exception as e:
+        latency_ms = (time.perf_counter() - start) * 1000
+        return {"endpoint": entry["endpoint"], "ok": False, "error": str(e), "latency_ms": latency_ms}
+    latency_ms = (time.perf_counter() - start) * 1000
+    status = None
+    if code == 200 and not entry["endpoint"].endswith("/stream"):
+        status = json.loads(body).get("status")
+    return {
+        "endpoint": entry["endpoint"],
+        "ok": code == 200,
+        "http_status": code,
+        "status": status,
+        "status_matches": status is None or status == entry.get("status"),
+        "latency_ms": latency_ms,
+    }
+
+
+def _percentiles(values: List[float]) -> Dict:
+    if not values:
+        return {"count": 0, "p50": 0, "p95": 0, "p99": 0, "max": 0}
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": round(values[int(len(values) * 0.50)], 2),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        "p99": round(values[min(len(values) - 1, int(len(values) * 0.99))], 2),
+        "max": round(values[-1], 2),
+    }
+
+
+def replay(entries: List[Dict], url: str, speed: float, concurrency: int, timeout: float) -> Dict:
+    """
+    Replay requests and compare them with the recording
+
+    Args:
+        entries: Recorded requests in arrival order
+        url: Base URL of the build under test
+        speed: Arrival-time multiplier (2 = twice as fast); 0 sends as fast
+            as the concurrency limit allows
+        concurrency: Requests in flight at once
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Per-endpoint recorded and replayed latency percentiles, errors,
+        status mismatches and overall throughput
+    """
+    results: List[Dict] = []
+    lock = threading.Lock()
+
+    def run(entry: Dict):
+        outcome = send(url, entry, timeout)
+        with lock:
+            results.append(outcome)
+
+    started = time.perf_counter()
+    first_at = entries[0]["at"] if entries else 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for entry in entries:
+            if speed > 0:
+                # Keep the recorded inter-arrival times, scaled
+                wait = (entry["at"] - first_at) / speed - (time.perf_counter() - started)
+                if wait > 0:
+                    time.sleep(wait)
+            pool.submit(run, entry)
+    wall = time.perf_counter() - started
+
+    report = {"requests": len(results), "wall_seconds": round(wall, 3),
+              "throughput_rps": round(len(results) / wall, 3) if wall else 0, "endpoints": {}}
+    for endpoint in sorted({entry["endpoint"] for entry in entries}):
+        recorded = [entry["latency_ms"] for entry in entries if entry["endpoint"] == endpoint]
+        replayed = [outcome for outcome in results if outcome["endpoint"] == endpoint]
+        before = _percentiles(recorded)
+        after = _percentiles([outcome["latency_ms"] for outcome in replayed if outcome["ok"]])
+        report["endpoints"][endpoint] = {
+            "recorded_ms": before,
+            "replayed_ms": after,
+            "p50_ratio": round(after["p50"] / before["p50"], 3) if before["p50"] and after["count"] else None,
+            "errors": sum(1 for outcome in replayed if not outcome["ok"]),
+            "status_mismatches": sum(1 for outcome in replayed if outcome["ok"] and not outcome["status_matches"]),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Pochita API traffic against a build")
+    parser.add_argument("traffic", help="JSONL file written with POCHITA_TRAFFIC_RECORD")
+    parser.add_argument("--url", default="http://localhost:8000", help="base URL of the build under test")
+    parser.add_argument("--speed", type=float, default=1.0, help="arrival-time multiplier; 0 = as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=300, help="per-request timeout in seconds")
+    parser.add_argument("--endpoint", action="append", help="only replay this endpoint (repeatable)")
+    args = parser.parse_args()
+
+    traffic = load_traffic(args.traffic, args.endpoint)
+    print(json.dumps(replay(traffic, args.url.rstrip("/"), args.speed, args.concurrency, args.timeout), indent=2))
@@ -0,0 +1,147 @@
+"""
+Response Shaping - Optional slimmer /generate and /execute payloads
+Field selection, log truncation and compression; unshaped requests get the full body
+"""
+
+import gzip
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is used instead
+    brotli = None
+
+LOG_FIELDS = ("output", "error", "raw_output")
+
+
+def truncate_log(text: str, limit: int) -> str:
+    """Keep the head and tail of a log, where setup errors and the pytest summary are"""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    head = limit // 2
+    tail = limit - head
+    return f"{text[:head]}\n... [{len(text) - limit} chars truncated] ...\n{text[len(text) - tail:]}"
+
+
+def shape_result(
+    result: Dict,
+    fields: Optional[List[str]] = None,
+    max_log_chars: Optional[int] = None,
+) -> Dict:
+    """
+    Slim a /generate or /execute result
+
+    Args:
+        result: Full response payload
+        fields: Top-level fields to keep ("status" is always kept)
+        max_log_chars: Longest output/error/raw_output returned; longer logs
+            keep their head and tail, and "truncated" lists the original
+            lengths of those that are returned
+
+    Returns:
+        A shaped copy; the input is not modified
+    """
+    shaped = dict(result)
+    if max_log_chars:
+        truncated = {}
+        for name in LOG_FIELDS:
+            value = shaped.get(name)
+            if isinstance(value, str) and len(value) > max_log_chars:
+                shaped[name] = truncate_log(value, max_log_chars)
+                truncated[name] = len(value)
+        if fields:
+            truncated = {name: length for name, length in truncated.items() if name in fields}
+        if truncated:
+            shaped["truncated"] = truncated
+    if fields:
+        keep = set(fields) | {"status", "truncated"}
+        shaped = {key: value for key, value in shaped.items() if key in keep}
+    return shaped
+
+
+def available_encodings(setting: str) -> List[str]:
+    """Content encodings to offer, in order of preference, for a POCHITA_COMPRESSION value"""
+    if setting == "none":
+        return []
+    if setting == "gzip":
+        return ["gzip"]
+    if setting in ("auto", "br"):
+        return (["br"] if brotli is not None else []) + ["gzip"]
+    raise ValueError(f"Unknown compression: {setting}")
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete response bodies above a size
+
+    Uses brotli when installed and accepted by the client, else gzip.
+    Server-Sent Event streams pass through untouched so events are not
+    held back in a compression buffer.
+    """
+
+    def __init__(self, app, encodings: List[str], minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.encodings = encodings
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, accept_encoding: str) -> Optional[str]:
+        accepted = set()
+        for item in accept_encoding.split(","):
+            name, _, params = item.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0"):
+                continue
+            accepted.add(name.strip().lower())
+        for encoding in self.encodings:
+            if encoding in accepted or "*" in accepted:
+                return encoding
+        return None
+
+    def _compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        chunks = []
+
+        async def compressing_send(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if headers.get("content-type", "").startswith("text/event-stream") or "content-encoding" in headers:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start_message["headers"])
+            if len(body) >= self.minimum_size:
+                body = self._compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+            headers["Content-Length"] = str(len(body))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, compressing_send)
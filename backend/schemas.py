@@ -0,0 +1,92 @@
+"""
+Request/Response Models for the Pochita API
+"""
+
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Optional, Literal
+
+
+class GenerateRequest(BaseModel):
+    prompt: str
+    description: Optional[str] = ""
+    session_id: Optional[str] = "default"
+    profile: Literal["default", "fast"] = "default"
+    # Pipeline stages: architect on/off, and full / code only / tests for provided code
+    architect: bool = True
+    mode: Literal["full", "code_only", "tests_only"] = "full"
+    code: Optional[str] = None
+    # Near-duplicate earlier prompt: report only, reuse its artifacts, or seed the coder;
+    # defaults to the server's POCHITA_SIMILARITY_REUSE
+    reuse: Optional[Literal["off", "reuse", "seed"]] = None
+    # Response shaping: top-level fields to return
+    fields: Optional[List[str]] = None
+    # Scheduling lane; defaults to the X-Priority header, then interactive (bulk for jobs)
+    priority: Optional[Literal["interactive", "bulk"]] = None
+    # Time budget in ms from arrival; defaults to the X-Deadline-Ms header
+    deadline_ms: Optional[int] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def check_code_for_tests_only(self):
+        if self.mode == "tests_only" and not (self.code or "").strip():
+            raise ValueError("code is required when mode is tests_only")
+        return self
+
+
+class ExecuteRequest(BaseModel):
+    code: str
+    tests: str
+    session_id: Optional[str] = "default"
+    priority: Optional[Literal["interactive", "bulk"]] = None
+    deadline_ms: Optional[int] = Field(default=None, gt=0)
+    # Run the tests under cProfile and tracemalloc and report per-function timings
+    profiling: bool = False
+    # Run the tests under per-test coverage and compute a minimal covering subset
+    minimize: bool = False
+    # "minimized" runs only the session's covering subset while code and tests are unchanged
+    test_selection: Literal["all", "minimized"] = "all"
+    # Response shaping: top-level fields to return, and the longest output/error/raw_output
+    fields: Optional[List[str]] = None
+    max_log_chars: Optional[int] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def check_modes(self):
+        if self.minimize and self.profiling:
+            raise ValueError("minimize and profiling cannot be combined")
+        if self.minimize and self.test_selection == "minimized":
+            raise ValueError("minimize needs the full suite; use test_selection 'all'")
+        if self.profiling and self.test_selection == "minimized":
+            raise ValueError("profiling runs the full suite; use test_selection 'all'")
+        return self
+
+
+class BenchmarkRequest(BaseModel):
+    # Defaults to the session's current code
+    code: Optional[str] = None
+    # bench_<name>(n) functions; defaults to the session's last benchmarks, else generated
+    benchmarks: Optional[str] = None
+    session_id: Optional[str] = "default"
+    priority: Optional[Literal["interactive", "bulk"]] = None
+    deadline_ms: Optional[int] = Field(default=None, gt=0)
+
+
+class Message(BaseModel):
+    role: str
+    content: str
+    agent_type: Optional[str] = None
+    timestamp: Optional[str] = None
+
+
+class GenerateResponse(BaseModel):
+    status: str
+    code: str
+    tests: str
+    conversation: List[Message]
+    usage: Optional[Dict] = None
+    profile: str = "default"
+    cacheable: bool = False
+    cached_stages: List[str] = []
+    stages: List[str] = []
+    similar_prompt: Optional[Dict] = None
+    scheduling: Optional[Dict] = None
+    deadline_exceeded: bool = False
+    trace_id: Optional[str] = None
@@ -0,0 +1,604 @@
+"""
+Pochita Backend Tests
+Run from backend/ with `pytest`; agent calls are answered by a fake provider
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app_factory import create_app
+from config import Settings
+import replay_traffic
+from agents.artifact_store import ArtifactStore
+from agents.benchmark import fit_complexity
+from agents.executor import CodeExecutor
+from agents.hedging import HedgedProvider
+from agents.job_queue import JobQueue
+from agents.model_router import ModelRouter, RoutingProvider
+from agents.prompt_index import PromptIndex
+from agents.replay import ReplayProvider, call_key
+from agents.scheduler import FairScheduler
+from agents.test_minimizer import minimize
+from agents.usage_tracker import UsageTracker
+
+
+TEXTS = {
+    "architect": "## Design\n- add two numbers",
+    "coder": "```python\ndef add(a, b):\n    return a + b\n```",
+    "tester": "```python\ndef test_add():\n    assert add(1, 2) == 3\n```",
+}
+
+
+# Modules that must only load on the first agent request
+LAZY_MODULES = ("google.generativeai", "agents.llm_provider", "agents.architect", "agents.coder", "agents.tester")
+# Import of the app on top of FastAPI/pydantic; the Gemini SDK alone takes ~450ms
+APP_IMPORT_BUDGET_MS = 250
+
+IMPORT_PROBE = """
+import json, sys, time
+import fastapi, pydantic, starlette.routing
+started = time.perf_counter()
+{import_app}
+import_ms = (time.perf_counter() - started) * 1000
+from fastapi.testclient import TestClient
+health = TestClient(app).get("/health").json()
+print(json.dumps({{"import_ms": import_ms, "health": health, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+class SlowProvider:
+    """Answers every agent call with a canned reply after a delay"""
+
+    name = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def generate(self, request):
+        time.sleep(self.delay)
+        usage = {"agent": request["agent"], "prompt_tokens": 5, "completion_tokens": 7, "total_tokens": 12, "latency_ms": 1.0}
+        return {"text": TEXTS[request["agent"]], "usage": usage}
+
+
+def make_client(tmp_path, provider, **settings) -> TestClient:
+    options = {"preload_agents": False, "job_workers": 0, "artifacts": "none", "job_db_path": str(tmp_path / "jobs.sqlite")}
+    options.update(settings)
+    return TestClient(create_app(Settings(**options), provider=provider))
+
+
+async def disconnect_after_event(app, path: str, payload: dict, event: str, delay: float = 0.5):
+    """POST to a streaming endpoint over ASGI and hang up `delay` seconds after an SSE event"""
+    seen = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": json.dumps(payload).encode(), "more_body": False}
+        await seen.wait()
+        await asyncio.sleep(delay)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and f"event: {event}\n".encode() in message.get("body", b""):
+            seen.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json")], "client": ("127.0.0.1", 1234), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+
+
+def test_usage_sessions_are_bounded():
+    """Per-session usage keeps only the most recently used sessions"""
+    tracker = UsageTracker(max_sessions=2)
+    record = {"agent": "coder", "prompt_tokens": 5, "completion_tokens": 7, "total_tokens": 12, "latency_ms": 1.0}
+    for session_id in ("a", "b", "a", "c"):
+        tracker.record(session_id, [record])
+    assert list(tracker.sessions) == ["a", "c"]
+    assert tracker.get_session("a")["requests"] == 2
+    assert tracker.get_session("b") is None
+    assert tracker.get_totals()["totals"]["requests"] == 4
+
+
+def test_concurrent_generates_in_one_session_do_not_mix(tmp_path):
+    """Two /generate calls on the shared default session each get only their own conversation"""
+    responses = {}
+
+    with make_client(tmp_path, SlowProvider(delay=0.05)) as client:
+        def generate(prompt):
+            responses[prompt] = client.post("/generate", json={"prompt": prompt}).json()
+
+        threads = [threading.Thread(target=generate, args=(prompt,)) for prompt in ("PROMPT-ONE", "PROMPT-TWO")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    for prompt, result in responses.items():
+        assert result["status"] == "success"
+        user_messages = [message["content"] for message in result["conversation"] if message["role"] == "user"]
+        assert user_messages == [prompt]
+        assert len(result["conversation"]) == 7
+
+
+def test_stream_disconnect_frees_the_session(tmp_path):
+    """A client that hangs up mid-stream stops its sandbox run and gives the session back"""
+    client = make_client(tmp_path, SlowProvider(), executor_timeout=60)
+    tests = "def test_slow():\n    import time\n    time.sleep(30)\n"
+
+    async def scenario():
+        started = time.perf_counter()
+        # Hang up while a worker thread waits on the sleeping test
+        await disconnect_after_event(client.app, "/execute/stream", {"code": "x = 1\n", "tests": tests}, "started")
+        session = client.app.state.components.sessions.get("default")
+        # The run is cancelled and the lock released long before the sleeping test would end
+        await asyncio.wait_for(session.lock.acquire(), timeout=10)
+        session.lock.release()
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 15
+
+
+def test_request_waiting_on_its_session_holds_no_slot(tmp_path):
+    """A request queued behind its own session does not take a slot from another session"""
+    responses = {}
+
+    with make_client(tmp_path, SlowProvider(delay=0.2), llm_slots=2, per_client_slots=2) as client:
+        def generate(name, session_id):
+            responses[name] = client.post("/generate", json={"prompt": name, "session_id": session_id}).json()
+
+        threads = []
+        for name, session_id in (("first", "a"), ("second", "a"), ("other", "b")):
+            threads.append(threading.Thread(target=generate, args=(name, session_id)))
+            threads[-1].start()
+            time.sleep(0.1)
+        for thread in threads:
+            thread.join()
+
+    # "other" gets the second slot while "second" waits for session a
+    assert responses["other"]["scheduling"]["waited_ms"] < 200
+    assert responses["second"]["scheduling"]["waited_ms"] < 200
+
+
+def test_job_lease_expires_into_the_queue_after_a_restart(tmp_path):
+    """A job claimed by a worker that died is claimed again once its lease runs out"""
+    path = str(tmp_path / "jobs.sqlite")
+    job_id = JobQueue(path).submit("execute", {"code": "x = 1"})
+    assert JobQueue(path, lease_seconds=0.2).claim()["id"] == job_id
+
+    restarted = JobQueue(path, lease_seconds=0.2, max_attempts=2)
+    assert restarted.claim() is None
+    time.sleep(0.3)
+    job = restarted.claim()
+    assert (job["id"], job["attempts"]) == (job_id, 2)
+
+    # Out of attempts, an expired lease fails the job instead
+    time.sleep(0.3)
+    assert restarted.claim() is None
+    assert restarted.get(job_id)["status"] == "failed"
+
+
+def test_finished_jobs_are_purged_after_the_retention_window(tmp_path):
+    """Claims delete jobs that finished before the retention window, and keep the rest"""
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), retention_seconds=0.2)
+    queue.PURGE_INTERVAL = 0
+    old, recent, queued = (queue.submit("execute", {}) for _ in range(3))
+    queue.complete(queue.claim()["id"], {"status": "success"})
+    time.sleep(0.3)
+    queue.fail(queue.claim()["id"], "boom")
+    assert queue.claim()["id"] == queued
+    assert queue.get(old) is None
+    assert queue.get(recent)["status"] == "failed"
+
+
+def test_abandoned_sandbox_stream_is_killed_on_cancel(tmp_path):
+    """Cancelling kills the child even when nobody iterates the stream any more"""
+    marker = tmp_path / "finished"
+    code = f"import pathlib, time\nprint('up', flush=True)\ntime.sleep(1.5)\npathlib.Path({str(marker)!r}).write_text('x')\n"
+    cancel = threading.Event()
+    stream = CodeExecutor(timeout=30).stream(code, cancel=cancel)
+    assert next(stream)["line"] == "up"
+    cancel.set()
+    time.sleep(2.5)
+    assert not marker.exists()
+    stream.close()
+
+
+class ScriptedProvider:
+    """Each call sleeps and reports the tokens of the next (seconds, tokens) step"""
+
+    name = "scripted"
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self._lock = threading.Lock()
+
+    def generate(self, request):
+        with self._lock:
+            delay, tokens = self.steps.pop(0)
+        time.sleep(delay)
+        usage = {"agent": request["agent"], "total_tokens": tokens, "latency_ms": delay * 1000}
+        return {"text": str(tokens), "usage": usage}
+
+
+def test_hedge_losers_are_billed_and_count_against_the_budget():
+    """The discarded call's tokens reach the usage totals and can exhaust the hedge budget"""
+    tracker = UsageTracker()
+    inner = ScriptedProvider([(0.01, 10), (0.01, 10), (0.4, 100), (0.01, 10), (0.2, 10)])
+    provider = HedgedProvider(
+        inner, percentile=50, min_samples=2, max_hedge_ratio=0.5,
+        on_discarded=lambda request, usage: tracker.record_calls(request["session_id"], [usage]),
+    )
+    request = {"agent": "coder", "prompt": "p", "session_id": "s"}
+
+    for _ in range(2):
+        tracker.record("s", [provider.generate(request)["usage"]])
+    # The slow primary is hedged and loses; its 100 tokens arrive after the request was recorded
+    result = provider.generate(request)
+    assert result["usage"]["hedge_won"] is True
+    tracker.record("s", [result["usage"]])
+    time.sleep(0.5)
+    session = tracker.get_session("s")
+    assert (session["requests"], session["total_tokens"], session["hedge_loser_tokens"]) == (3, 130, 100)
+
+    # 100 of 130 tokens were discarded, over half, so the next slow call is not hedged
+    # even though the call budget (2 of 4 calls) would allow it
+    assert provider.generate(request)["text"] == "10"
+    assert provider.stats()["skipped_over_budget"] == 1
+    assert provider.stats()["hedged"] == 1
+
+
+class FlakyProvider:
+    """Fails every call to the models in `failing`, answers the rest"""
+
+    name = "flaky"
+
+    def __init__(self, failing):
+        self.failing = set(failing)
+        self.calls = []
+
+    def generate(self, request):
+        self.calls.append(request["model"])
+        if request["model"] in self.failing:
+            raise RuntimeError(f"{request['model']} unavailable")
+        return {"text": "ok", "usage": {"agent": request["agent"], "total_tokens": 1}}
+
+
+def test_circuit_opens_then_lets_a_trial_call_through():
+    """Consecutive failures open a model's circuit; after the cooldown one trial call decides"""
+    inner = FlakyProvider(failing={"fast"})
+    router = ModelRouter(tiers=["fast", "strong"], failure_threshold=2, cooldown=0.2)
+    provider = RoutingProvider(inner, router)
+    request = {"agent": "coder", "prompt": "p", "hints": {}}
+
+    for _ in range(2):
+        assert provider.generate(request)["usage"]["fallback"] is True
+    assert router.stats()["models"]["fast"]["circuit_open"] is True
+    provider.generate(request)
+    assert inner.calls[-1] == "strong"
+
+    # Half-open: the trial fails and the circuit opens again straight away
+    time.sleep(0.25)
+    provider.generate(request)
+    assert inner.calls[-2:] == ["fast", "strong"]
+    assert router.stats()["models"]["fast"]["circuit_open"] is True
+
+    # A successful trial closes it
+    time.sleep(0.25)
+    inner.failing.clear()
+    assert provider.generate(request)["usage"]["fallback"] is False
+    assert router.stats()["models"]["fast"]["consecutive_failures"] == 0
+
+
+def test_calls_cut_short_by_the_request_do_not_count_against_the_model():
+    """Deadline-exceeded and cancelled calls leave the circuit alone and are not retried"""
+    inner = FlakyProvider(failing={"fast", "strong"})
+    router = ModelRouter(tiers=["fast", "strong"], failure_threshold=1)
+    provider = RoutingProvider(inner, router)
+    cancel = threading.Event()
+    cancel.set()
+    for request in (
+        {"agent": "coder", "prompt": "p", "deadline": time.monotonic() - 1},
+        {"agent": "coder", "prompt": "p", "cancel": cancel},
+    ):
+        with pytest.raises(RuntimeError):
+            provider.generate(request)
+    assert inner.calls == ["fast", "fast"]
+    assert router.stats()["models"]["fast"] == {
+        "calls": 0, "errors": 0, "consecutive_failures": 0, "circuit_open": False
+    }
+
+
+def test_scheduler_serves_clients_fairly_within_their_caps():
+    """Slots alternate between clients, interactive goes first, and no client exceeds its cap"""
+    async def scenario():
+        scheduler = FairScheduler({"llm": 1, "sandbox": 3}, per_client_limit=2)
+        order, queued = [], []
+
+        async def request(client, lane="interactive", hold=0.01):
+            async with scheduler.slot("llm", client, lane, on_queued=queued.append):
+                order.append(client)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(request("x"), request("bulk", "bulk"), request("ui"))
+        assert order == ["x", "ui", "bulk"]
+
+        # "a" sends three requests before "b" sends one; "b" is served second
+        order.clear()
+        queued.clear()
+        await asyncio.gather(*(request(client) for client in ("a", "a", "a", "b")))
+        assert order == ["a", "b", "a", "a"]
+        assert [ticket.client for ticket in queued] == ["a", "a", "b"]
+
+        # "a" may hold two of the three sandbox slots; its third request waits while "b" gets one
+        release = asyncio.Event()
+
+        async def hold(client):
+            async with scheduler.slot("sandbox", client, "interactive"):
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold(client)) for client in ("a", "a", "a", "b")]
+        await asyncio.sleep(0.01)
+        stats = scheduler.stats()["sandbox"]
+        assert (stats["in_use"], stats["active_clients"], stats["waiting"]["interactive"]) == (3, {"a": 2, "b": 1}, 1)
+        release.set()
+        await asyncio.gather(*tasks)
+
+        # Clients that went idle are forgotten
+        for state in scheduler.resources.values():
+            assert state.active == {} and state.last_finish == {}
+
+    asyncio.run(scenario())
+
+
+def test_execute_refinement_holds_an_llm_slot(tmp_path):
+    """The tester call that refines failing tests is scheduled on the llm resource"""
+    with make_client(tmp_path, SlowProvider()) as client:
+        scheduler = client.app.state.components.scheduler
+        generated = client.post("/generate", json={"prompt": "add two numbers"}).json()
+        assert scheduler.stats()["llm"]["served"] == 1
+        result = client.post("/execute", json={
+            "code": generated["code"],
+            "tests": "def test_add():\n    assert add(1, 1) == 3\n",
+        }).json()
+        stats = scheduler.stats()
+    assert result["scheduling"]["resource"] == "sandbox"
+    assert (stats["sandbox"]["served"], stats["llm"]["served"]) == (1, 2)
+
+
+def test_fit_complexity_picks_the_growth_class_of_the_timings():
+    """Clean timings fit their own class; fewer than three usable sizes give no fit"""
+    sizes = [16, 64, 256, 1024]
+    for complexity, model in [
+        ("O(n)", lambda n: n),
+        ("O(n log n)", lambda n: n * math.log2(n)),
+        ("O(n^2)", lambda n: n * n),
+    ]:
+        fit = fit_complexity([{"n": n, "seconds": 1e-6 * model(n)} for n in sizes])
+        assert fit["complexity"] == complexity
+        assert fit["errors"][complexity] < 0.01
+    assert fit["exponent"] == pytest.approx(2, abs=0.01)
+
+    # Jitter of +-10% does not move a linear curve into another class
+    noisy = [{"n": n, "seconds": 1e-6 * n * jitter} for n, jitter in zip(sizes, [1.1, 0.9, 1.1, 0.9])]
+    assert fit_complexity(noisy)["complexity"] == "O(n)"
+
+    # n <= 1 and zero timings are dropped before counting points
+    sparse = [{"n": 1, "seconds": 1.0}, {"n": 10, "seconds": 0}, {"n": 100, "seconds": 1e-4}, {"n": 1000, "seconds": 1e-3}]
+    assert fit_complexity(sparse) == {"complexity": None, "exponent": None, "errors": {}}
+
+
+def test_minimize_keeps_failures_and_the_cheapest_cover():
+    """Failing tests always stay, ties go to the faster test, and unique assertion targets count"""
+    def test(lines, duration_ms, outcome="passed", function=None):
+        return {"lines": lines, "arcs": [[line, line + 1] for line in lines[:-1]],
+                "outcome": outcome, "duration_ms": duration_ms, "function": function}
+
+    report = {
+        "tests": {
+            "slow": test([1, 2, 3], 5.0),
+            "fast": test([1, 2, 3], 2.0),
+            "subset": test([1, 2], 1.0),
+            "failing": test([4], 2.0, outcome="failed"),
+            "checks_sub": test([1], 1.0, function="test_sub"),
+        },
+        "assertion_targets": {"test_sub": ["sub"]},
+        "executable_lines": [1, 2, 3, 4, 5],
+    }
+    result = minimize(report)
+    assert result["selected"] == ["failing", "fast", "checks_sub"]
+    assert result["redundant"] == ["slow", "subset"]
+    assert result["coverage"]["line_coverage"] == 0.8
+    assert result["coverage"]["selected_covered_lines"] == result["coverage"]["covered_lines"] == 4
+    assert result["runtime"] == {"full_ms": 11.0, "selected_ms": 5.0, "saved_ms": 6.0, "saved_ratio": 0.5455}
+
+
+def test_prompt_index_matches_at_or_above_its_threshold():
+    """Rewordings of a prompt match, weaker overlaps only under a lower threshold, never across profiles"""
+    artifacts = {"prompt": "reverse a string", "architect": None, "code": "c", "tests": ""}
+    loose, strict = PromptIndex(threshold=0.6), PromptIndex(threshold=0.7)
+    for index in (loose, strict):
+        index.add("reverse a string", "full", artifacts)
+
+    assert strict.lookup("Write a python function that reverses strings", "full")["score"] == 1.0
+    # Jaccard 0.64: one extra content word
+    assert loose.lookup("reverse a string in place", "full")["score"] == pytest.approx(0.643, abs=0.001)
+    assert strict.lookup("reverse a string in place", "full") is None
+    assert loose.lookup("sort a list of numbers", "full") is None
+    assert loose.lookup("reverse a string", "code_only") is None
+    assert loose.lookup("reverse a string", "full", require_tests=True) is None
+    assert (loose.stats()["hits"], loose.stats()["misses"]) == (1, 3)
+
+
+def stored_files(store) -> dict:
+    return {path.name: path.stat().st_size for path in Path(store.objects_dir).rglob("*") if path.is_file()}
+
+
+def test_artifact_gc_drops_the_oldest_runs_but_keeps_shared_objects(tmp_path):
+    """Over budget, the oldest runs go with the objects only they used; the byte count matches the disk"""
+    store = ArtifactStore(str(tmp_path), max_bytes=2000)
+    tests = "def test_add():\n    assert add(1, 2) == 3\n"
+    run_ids = [
+        store.record("execute", f"# run {i}\n" + "x = 1\n" * 50, tests, {"status": "success"}, passed=True)
+        for i in range(10)
+    ]
+    stats = store.stats()
+    assert stats["bytes"] <= 2000
+    assert store.get(run_ids[0]) is None and store.get(run_ids[-1])["tests"] == tests
+    assert stats["runs"] < 10 and stats["objects"] == stats["runs"] + 2
+    files = stored_files(store)
+    assert (len(files), sum(files.values())) == (stats["objects"], stats["bytes"])
+
+    # A run that fails to index leaves neither files nor bytes behind
+    with pytest.raises(ValueError):
+        store.record("execute", "def fresh():\n    pass\n", tests, {"status": "error"}, passed="maybe")
+    assert store.stats() == stats and stored_files(store) == files
+    store.close()
+
+
+def test_artifact_endpoints_require_the_admin_token(tmp_path):
+    """Stored code and prompts are only readable with X-Admin-Token"""
+    with make_client(
+        tmp_path, SlowProvider(), artifacts="sqlite", artifact_dir=str(tmp_path / "artifacts"), admin_token="secret"
+    ) as client:
+        generated = client.post("/generate", json={"prompt": "add two numbers"}).json()
+        digest = hashlib.sha256(generated["code"].encode()).hexdigest()
+        paths = ["/artifacts", "/artifacts/1", f"/artifacts/objects/{digest}"]
+        assert [client.get(path).status_code for path in paths] == [403, 403, 403]
+        assert [client.get(path, headers={"X-Admin-Token": "wrong"}).status_code for path in paths] == [403, 403, 403]
+        admin = {"X-Admin-Token": "secret"}
+        assert len(client.get("/artifacts", headers=admin).json()["runs"]) == 1
+        assert client.get("/artifacts/1", headers=admin).json()["code"] == generated["code"]
+        assert client.get(f"/artifacts/objects/{digest}", headers=admin).json()["content"] == generated["code"]
+
+
+def test_replay_serves_exact_calls_in_order_then_the_most_similar_prompt(tmp_path):
+    """Identical calls cycle through their recordings; unmatched prompts get the closest one of the agent"""
+    def recorded(agent, prompt, text):
+        request = {"agent": agent, "prompt": prompt, "config": {}}
+        return {"key": call_key(request), **request, "text": text, "usage": {"total_tokens": 1}, "latency_ms": 1.0}
+
+    path = tmp_path / "calls.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in [
+        recorded("coder", "add two numbers", "first"),
+        recorded("coder", "add two numbers", "second"),
+        recorded("coder", "sort a list of strings", "sorted"),
+    ]))
+    provider = ReplayProvider(str(path), latency_scale=0)
+    texts = [provider.generate({"agent": "coder", "prompt": "add two numbers"})["text"] for _ in range(3)]
+    assert texts == ["first", "second", "first"]
+    assert provider.generate({"agent": "coder", "prompt": "sort the strings in a list quickly"})["text"] == "sorted"
+    with pytest.raises(Exception, match="No recorded tester call"):
+        provider.generate({"agent": "tester", "prompt": "add two numbers"})
+    assert provider.stats() == {"calls": 5, "exact": 3, "nearest": 1, "missing": 1, "recorded_calls": 3}
+
+
+def test_recorded_traffic_replays_its_scheduling_headers(tmp_path, monkeypatch):
+    """API key, priority and deadline headers are logged and sent again by replay_traffic.py"""
+    path = tmp_path / "traffic.jsonl"
+    headers = {"X-API-Key": "team-a", "X-Priority": "bulk", "X-Deadline-Ms": "60000"}
+    with make_client(tmp_path, SlowProvider(), traffic_record_path=str(path)) as client:
+        client.post("/generate", json={"prompt": "add two numbers"}, headers={**headers, "X-Other": "x"})
+    entry = replay_traffic.load_traffic(str(path))[0]
+    assert entry["headers"] == {"x-api-key": "team-a", "x-priority": "bulk", "x-deadline-ms": "60000"}
+
+    sent = []
+
+    class Response:
+        status = 200
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def read(self):
+            return json.dumps({"status": entry["status"]}).encode()
+
+    def urlopen(request, timeout):
+        sent.append(request)
+        return Response()
+
+    monkeypatch.setattr(replay_traffic.urllib.request, "urlopen", urlopen)
+    assert replay_traffic.send("http://target", entry, timeout=1)["status_matches"] is True
+    assert {name.lower(): value for name, value in sent[0].header_items()} == {
+        "content-type": "application/json", **entry["headers"]
+    }
+
+
+def test_profiling_rejects_minimized_selection(tmp_path):
+    """The profiling runner runs the whole suite, so it cannot honour a minimized selection"""
+    with make_client(tmp_path, SlowProvider()) as client:
+        response = client.post("/execute", json={
+            "code": "def add(a, b):\n    return a + b\n",
+            "tests": "def test_add():\n    assert add(1, 2) == 3\n",
+            "profiling": True,
+            "test_selection": "minimized",
+        })
+    assert response.status_code == 422
+
+
+def test_execute_shaping_reports_only_returned_truncation(tmp_path):
+    """Truncated lengths are listed only for log fields the response still contains"""
+    tests = "def test_noisy():\n    print('x' * 3000)\n    assert add(1, 1) == 2\n"
+    with make_client(tmp_path, SlowProvider()) as client:
+        result = client.post("/execute", json={
+            "code": "def add(a, b):\n    return a + b\n",
+            "tests": tests + "\ndef test_add():\n    assert add(1, 1) == 3\n",
+            "fields": ["output"],
+            "max_log_chars": 200,
+        }).json()
+    assert set(result) == {"status", "output", "truncated"}
+    assert set(result["truncated"]) == {"output"}
+    assert len(result["output"]) < 300
+
+
+def test_conversation_since_returns_refinements_after_generate(tmp_path):
+    """A client holding a /generate conversation fetches only the messages added later"""
+    with make_client(tmp_path, SlowProvider()) as client:
+        generated = client.post("/generate", json={"prompt": "add two numbers"}).json()
+        held = len(generated["conversation"])
+        client.post("/execute", json={
+            "code": generated["code"],
+            "tests": "def test_add():\n    assert add(1, 1) == 3\n",
+        })
+        delta = client.get(f"/conversation/default?since={held}").json()
+    assert delta["conversation_offset"] == held
+    assert delta["conversation_total"] == held + len(delta["conversation"])
+    assert [message["role"] for message in delta["conversation"]] == ["system", "tester"]
+
+
+@pytest.mark.parametrize("import_app", [
+    "import main; app = main.app",
+    "import runpy; app = runpy.run_path('../api/index.py')['app']",
+], ids=["main", "api_index"])
+def test_entry_points_import_without_agents(tmp_path, import_app):
+    """Importing an entry point must not load the Gemini SDK or the agents"""
+    backend = Path(__file__).parent
+    env = {key: value for key, value in os.environ.items() if not key.startswith("POCHITA_")}
+    env.update(POCHITA_ARTIFACTS="none", POCHITA_JOB_DB=str(tmp_path / "jobs.sqlite"))
+    probe = IMPORT_PROBE.format(import_app=import_app, lazy=LAZY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], cwd=backend, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert completed.returncode == 0, completed.stderr
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert report["loaded"] == []
+    assert report["health"]["startup"]["agents_loaded"] is False
+    assert report["import_ms"] < APP_IMPORT_BUDGET_MS
@@ -8,6 +8,16 @@ import './App.css'
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
+// Each browser tab gets its own backend session, so users do not share one
+// conversation or wait on each other's runs
+const SESSION_ID = (() => {
+  const stored = sessionStorage.getItem('pochita-session-id')
+  if (stored) return stored
+  const id = crypto.randomUUID()
+  sessionStorage.setItem('pochita-session-id', id)
+  return id
+})()
+
 function App() {
   const [prompt, setPrompt] = useState('')
   const [description, setDescription] = useState('')
@@ -18,6 +28,7 @@ function App() {
   const [testResults, setTestResults] = useState(null)
   const [activeTab, setActiveTab] = useState('architecture')
   const [expandedAgent, setExpandedAgent] = useState(null)
+  const [profiling, setProfiling] = useState(false)
 
   const handleGenerate = async (e) => {
     e.preventDefault()
@@ -40,6 +51,7 @@ function App() {
         body: JSON.stringify({
           prompt: prompt.trim(),
           description: description.trim(),
+          session_id: SESSION_ID,
         }),
       })
 
@@ -78,6 +90,8 @@ function App() {
         body: JSON.stringify({
           code: response.code,
           tests: response.tests,
+          session_id: SESSION_ID,
+          profiling,
         }),
       })
 
@@ -210,6 +224,15 @@ function App() {
               )}
             </div>
             <div className="tabs-actions">
+              <label className="profile-toggle" title="Report where the tests spend their time">
+                <input
+                  type="checkbox"
+                  checked={profiling}
+                  onChange={(e) => setProfiling(e.target.checked)}
+                  disabled={executing}
+                />
+                Profile
+              </label>
               <button
                 className="execute-btn"
                 onClick={handleExecute}
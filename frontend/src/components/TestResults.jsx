@@ -51,6 +51,10 @@ export default function TestResults({ results, onExecute, code, tests, isExecuti
               <div key={idx} className={`test-item ${test.status}`}>
                 <span className="test-name">{test.name}</span>
                 {test.params && <span className="test-params">[{test.params}]</span>}
+                {test.duration_ms != null && (
+                  <span className="test-metrics">{test.duration_ms} ms · {test.peak_memory_kib} KiB peak</span>
+                )}
+                {test.redundant && <span className="test-metrics">redundant</span>}
                 <span className={`test-badge ${test.status}`}>{test.status}</span>
               </div>
             ))}
@@ -58,6 +62,32 @@ export default function TestResults({ results, onExecute, code, tests, isExecuti
         </div>
       )}
 
+      {results.profiling && results.profiling.functions.length > 0 && (
+        <div className="test-details">
+          <h3>Profile</h3>
+          <table className="profile-table">
+            <thead>
+              <tr>
+                <th>Function</th>
+                <th>Calls</th>
+                <th>Cumulative (ms)</th>
+                <th>Own (ms)</th>
+              </tr>
+            </thead>
+            <tbody>
+              {results.profiling.functions.map((fn, idx) => (
+                <tr key={idx} className={fn.kind}>
+                  <td className="test-name">{fn.function}</td>
+                  <td>{fn.calls}</td>
+                  <td>{fn.cumulative_time_ms}</td>
+                  <td>{fn.own_time_ms}</td>
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
+
       {results.output && (
         <div className="test-output">
           <h3>Output</h3>